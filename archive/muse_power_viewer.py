@@ -8,14 +8,36 @@ import sys
 import asyncio
 import numpy as np
 import time
-import bitstring
-from collections import deque
+import queue
+import threading
 from PyQt5 import QtWidgets, QtCore, QtGui
 import pyqtgraph as pg
 from bleak import BleakScanner, BleakClient
 import qasync
-from scipy.fft import fft, fftfreq
-from scipy.signal import welch
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.fft import rfft, rfftfreq
+from scipy.signal import windows
+import scipy.fft
+
+# pyFFTWがインストールされていればscipy.fftのバックエンドとして使用（プランをキャッシュ）
+try:
+    import pyfftw
+    scipy.fft.set_global_backend(pyfftw.interfaces.scipy_fft)
+    pyfftw.interfaces.cache.enable()
+    pyfftw.interfaces.cache.set_keepalive_time(60)
+except ImportError:
+    pass
+
+# Numba + rocket-fft がインストールされていればWelch/帯域パワー計算をJITコンパイル
+try:
+    from numba import njit
+    import rocket_fft  # noqa: F401  Numba内でnp.fftを使えるようにする
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
+# デバッグ出力（Trueにすると解析途中の統計値をコンソールに表示）
+DEBUG = False
 
 # Muse constants
 MUSE_SAMPLING_EEG_RATE = 256
@@ -26,12 +48,76 @@ MUSE_GATT_ATTR_AF8 = '273e0005-4c4d-454d-96be-f03bac821358'
 MUSE_GATT_ATTR_TP10 = '273e0006-4c4d-454d-96be-f03bac821358'
 MUSE_GATT_ATTR_RIGHTAUX = '273e0007-4c4d-454d-96be-f03bac821358'
 
+def _welch_band_powers(signals, window, psd_scale, band_lo, band_hi, df, step):
+    """Welch法PSD〜帯域パワー積分までの計算カーネル（signals: (C, N)、戻り値: (C, 帯域数)）"""
+    n_channels, n_samples = signals.shape
+    nperseg = window.shape[0]
+    n_segments = 1 + (n_samples - nperseg) // step
+    n_bins = nperseg // 2 + 1
+    out = np.zeros((n_channels, band_lo.shape[0]))
+    segment = np.empty(nperseg, dtype=window.dtype)
+    psd = np.empty(n_bins)
+    
+    for ch in range(n_channels):
+        psd[:] = 0.0
+        for seg in range(n_segments):
+            start = seg * step
+            # セグメントの平均除去 + 窓掛け
+            mean = 0.0
+            for k in range(nperseg):
+                mean += signals[ch, start + k]
+            mean /= nperseg
+            for k in range(nperseg):
+                segment[k] = (signals[ch, start + k] - mean) * window[k]
+            
+            spectrum = np.fft.rfft(segment)
+            for k in range(n_bins):
+                psd[k] += spectrum[k].real * spectrum[k].real + spectrum[k].imag * spectrum[k].imag
+        
+        for k in range(n_bins):
+            psd[k] *= psd_scale[k] / n_segments
+        
+        # 等間隔の台形積分
+        for b in range(band_lo.shape[0]):
+            lo = band_lo[b]
+            hi = band_hi[b]
+            if hi > lo:
+                total = 0.0
+                for k in range(lo, hi):
+                    total += psd[k]
+                out[ch, b] = df * (total - 0.5 * (psd[lo] + psd[hi - 1]))
+    return out
+
+if HAS_NUMBA:
+    _welch_band_powers = njit(cache=True, fastmath=True)(_welch_band_powers)
+
+def warmup_jit():
+    """JIT関数を一度呼んでおき、最初のパワー計算（GUIタイマー上）でコンパイル待ちが発生しないようにする"""
+    if HAS_NUMBA:
+        # 実際と同じ引数（float32の(4, 256)信号・窓・psd_scale、int64の帯域境界）でコンパイルさせる
+        PowerAnalyzer().calculate_band_powers_batch(np.zeros((4, 256), dtype=np.float32))
+
 class PowerAnalyzer:
     """パワースペクトラム解析クラス"""
     def __init__(self, sample_rate=256, window_size=1.0):  # 1秒に短縮
         self.sample_rate = sample_rate
         self.window_samples = int(sample_rate * window_size)
         
+        # Welch法のパラメータ（窓長が固定なので事前計算）
+        self.nperseg = min(self.window_samples // 2, 128)  # より小さなセグメント
+        self.noverlap = self.nperseg // 2
+        self.step = self.nperseg - self.noverlap  # セグメントの移動幅
+        self.n_segments = 1 + (self.window_samples - self.nperseg) // self.step
+        # 12ビットADCの信号なのでfloat32で十分（FFTもcomplex64で計算される）
+        self.window = windows.hann(self.nperseg, sym=False).astype(np.float32)
+        self.freqs = rfftfreq(self.nperseg, 1.0 / self.sample_rate)
+        # 密度スケーリング + 片側スペクトル補正（DCと偶数長のナイキスト以外は2倍）
+        self.psd_scale = np.full(len(self.freqs), 2.0 / (self.sample_rate * (self.window.astype(np.float64) ** 2).sum()),
+                                 dtype=np.float32)
+        self.psd_scale[0] /= 2
+        if self.nperseg % 2 == 0:
+            self.psd_scale[-1] /= 2
+        
         # 周波数帯域定義
         self.bands = {
             'theta': (4, 8),
@@ -39,64 +125,82 @@ class PowerAnalyzer:
             'beta': (13, 30)
         }
         
+        # 帯域ごとの周波数インデックス範囲（freqsは固定なので連続スライスとして保持）
+        self.band_slices = {}
+        for band_name, (low_freq, high_freq) in self.bands.items():
+            lo = int(np.searchsorted(self.freqs, low_freq, side='left'))
+            hi = int(np.searchsorted(self.freqs, high_freq, side='right'))
+            self.band_slices[band_name] = slice(lo, hi)
+        self.df = self.freqs[1] - self.freqs[0]  # 周波数刻み（等間隔）
+        self.band_lo = np.array([s.start for s in self.band_slices.values()], dtype=np.int64)
+        self.band_hi = np.array([s.stop for s in self.band_slices.values()], dtype=np.int64)
+        
         # デバッグ用カウンター
         self.calculation_count = 0
         
     def calculate_band_power(self, data):
-        """周波数帯域別パワー計算"""
-        self.calculation_count += 1
+        """周波数帯域別パワー計算（1チャンネル）"""
+        powers = self.calculate_band_powers_batch(np.asarray(data)[np.newaxis])
+        return {band: float(power[0]) for band, power in powers.items()}
+    
+    def calculate_band_powers_batch(self, signals):
+        """周波数帯域別パワー計算（複数チャンネルを一括処理、signals: (C, N)）"""
+        if DEBUG:
+            self.calculation_count += 1
+        n_channels = signals.shape[0]
         
-        if len(data) < self.window_samples:
-            print(f"Debug: Not enough data - have {len(data)}, need {self.window_samples}")
-            return {'theta': 0, 'alpha': 0, 'beta': 0}
+        if signals.shape[-1] < self.window_samples:
+            if DEBUG:
+                print(f"Debug: Not enough data - have {signals.shape[-1]}, need {self.window_samples}")
+            return {band: np.zeros(n_channels) for band in self.bands}
         
         # 最新のwindow_samples分のデータを使用
-        signal = np.array(data[-self.window_samples:])
-        
-        # データの基本統計
-        signal_mean = np.mean(signal)
-        signal_std = np.std(signal)
-        signal_range = np.ptp(signal)
+        signals = signals[:, -self.window_samples:]
         
-        # DC成分除去
-        signal = signal - signal_mean
+        # Numbaが使える場合は窓掛け〜FFT〜帯域積分を1回のネイティブ呼び出しで計算
+        if HAS_NUMBA:
+            result = _welch_band_powers(signals, self.window, self.psd_scale,
+                                        self.band_lo, self.band_hi, self.df,
+                                        self.step)
+            return {band: result[:, b] for b, band in enumerate(self.band_slices)}
         
-        # Welch法でパワースペクトル密度計算（パラメータ調整）
+        # Welch法でパワースペクトル密度計算（全チャンネル・全セグメントを一括FFT）
         try:
-            # npersegを調整してより適切な周波数分解能を得る
-            nperseg = min(self.window_samples // 2, 128)  # より小さなセグメント
-            freqs, psd = welch(signal, 
-                             fs=self.sample_rate, 
-                             nperseg=nperseg,
-                             noverlap=nperseg//2,
-                             window='hann')
-            
-            # デバッグ情報（最初の数回のみ）
-            if self.calculation_count <= 3:
+            segments = sliding_window_view(signals, self.nperseg, axis=-1)[:, ::self.step]
+            # セグメントごとの平均除去（DC成分除去、welchのdetrend='constant'相当）
+            segments = segments - segments.mean(axis=-1, keepdims=True)
+            spectrum = rfft(segments * self.window, axis=-1, workers=-1)
+            # |X|^2 を実部・虚部から直接計算（abs の平方根を省く）
+            psd = (spectrum.real * spectrum.real + spectrum.imag * spectrum.imag).mean(axis=-2)
+            psd *= self.psd_scale
+            freqs = self.freqs
+            
+            # デバッグ情報
+            if DEBUG:
                 print(f"Debug calc #{self.calculation_count}:")
-                print(f"  Signal: mean={signal_mean:.2f}, std={signal_std:.2f}, range={signal_range:.2f}")
+                for ch in range(n_channels):
+                    print(f"  Signal[{ch}]: mean={np.mean(signals[ch]):.2f}, std={np.std(signals[ch]):.2f}, range={np.ptp(signals[ch]):.2f}")
                 print(f"  Freqs range: {freqs[0]:.2f}-{freqs[-1]:.2f} Hz")
                 print(f"  PSD range: {np.min(psd):.2e}-{np.max(psd):.2e}")
                 
         except Exception as e:
             print(f"Welch calculation error: {e}")
-            return {'theta': 0, 'alpha': 0, 'beta': 0}
+            return {band: np.zeros(n_channels) for band in self.bands}
         
-        # 各帯域のパワー計算
+        # 各帯域のパワー計算（チャンネルごとの配列）
         powers = {}
-        for band_name, (low_freq, high_freq) in self.bands.items():
-            band_mask = (freqs >= low_freq) & (freqs <= high_freq)
-            if np.any(band_mask):
-                band_power = np.trapz(psd[band_mask], freqs[band_mask])
+        for band_name, band_slice in self.band_slices.items():
+            band_psd = psd[:, band_slice]
+            if band_psd.shape[-1] > 0:
+                # 等間隔の台形積分: df * (総和 - 両端の半分)
+                band_power = self.df * (band_psd.sum(axis=-1) - 0.5 * (band_psd[:, 0] + band_psd[:, -1]))
                 powers[band_name] = band_power
                 
-                # デバッグ情報（最初の数回のみ）
-                if self.calculation_count <= 3:
-                    band_freqs = freqs[band_mask]
-                    band_psd = psd[band_mask]
-                    print(f"  {band_name}: {len(band_freqs)} freq points, power={band_power:.2e}")
+                # デバッグ情報
+                if DEBUG:
+                    print(f"  {band_name}: {band_psd.shape[-1]} freq points, power={band_power}")
             else:
-                powers[band_name] = 0
+                powers[band_name] = np.zeros(n_channels)
                 
         return powers
     
@@ -114,38 +218,31 @@ class MusePowerViewer(QtWidgets.QMainWindow):
         self.device_address = None
         self.is_streaming = False
         
-        # EEGデータバッファ（長めに設定してパワー計算に使用）
+        # EEGデータリングバッファ（長めに設定してパワー計算に使用）
+        # 行: TP9, AF7, AF8, TP10
         self.buffer_size = 1024  # 4秒分程度
-        self.eeg_data = {
-            'TP9': deque(maxlen=self.buffer_size),
-            'AF7': deque(maxlen=self.buffer_size),
-            'AF8': deque(maxlen=self.buffer_size),
-            'TP10': deque(maxlen=self.buffer_size)
-        }
+        self.eeg_ring = np.zeros((4, self.buffer_size), dtype=np.float32)
+        self.eeg_write = 0  # これまでに書き込んだサンプル数
+        self._ring_lock = threading.Lock()  # デコードスレッドとUI側の排他
+        
+        # BLE通知の受信キュー（デコードはバックグラウンドスレッドで行う）
+        self._raw_q = queue.SimpleQueue()
+        self._decoder_thread = None
         
         # パワー成分データ
         self.power_history_size = 60  # 30秒分（0.5秒毎）
-        self.power_data = {
-            'TP9': {'theta': deque(maxlen=self.power_history_size),
-                   'alpha': deque(maxlen=self.power_history_size),
-                   'beta': deque(maxlen=self.power_history_size)},
-            'AF7': {'theta': deque(maxlen=self.power_history_size),
-                   'alpha': deque(maxlen=self.power_history_size),
-                   'beta': deque(maxlen=self.power_history_size)},
-            'AF8': {'theta': deque(maxlen=self.power_history_size),
-                   'alpha': deque(maxlen=self.power_history_size),
-                   'beta': deque(maxlen=self.power_history_size)},
-            'TP10': {'theta': deque(maxlen=self.power_history_size),
-                    'alpha': deque(maxlen=self.power_history_size),
-                    'beta': deque(maxlen=self.power_history_size)}
-        }
+        # 行: TP9, AF7, AF8, TP10 / 列: theta, alpha, beta の履歴リングバッファ
+        self.power_hist = np.zeros((4, 3, self.power_history_size), dtype=np.float32)
+        self.power_hist_w = 0  # これまでに書き込んだ履歴数
         
         # パワー解析器
         self.power_analyzer = PowerAnalyzer()
         
         # muse-lsl互換のデータ処理変数
-        self.timestamps = np.full(5, np.nan)
-        self.data = np.zeros((5, 12))
+        # パケット組み立て用バッファ（毎回確保せずに使い回す）
+        self.timestamps = np.empty(5, dtype=np.float64)
+        self.timestamps.fill(np.nan)
+        self.data = np.zeros((5, 12), dtype=np.float32)
         self.last_tm = 0
         self.first_sample = True
         self.sample_index = 0
@@ -180,16 +277,20 @@ class MusePowerViewer(QtWidgets.QMainWindow):
         self.sample_count = 0
         self.start_time = None
         self.last_power_calc = 0
+        self._last_drawn_samples = -1  # 前回描画時のサンプル数
+        
+        # 波形表示は4サンプルごとに間引く（x軸はサンプル番号のまま）
+        self.wave_decimation = 4
+        self._wave_x = np.arange(0, 256, self.wave_decimation)
         
         # UI初期化
         self.init_ui()
         
-        # タイマー設定
+        # タイマー設定（描画とパワー計算を1つのタイマーで回す）
         self.plot_timer = QtCore.QTimer()
         self.plot_timer.timeout.connect(self.update_plots)
-        
-        self.power_timer = QtCore.QTimer()
-        self.power_timer.timeout.connect(self.calculate_powers)
+        self.power_calc_every = 5  # 描画5回（0.5秒）毎にパワー計算
+        self._tick = 0
     
     def init_ui(self):
         """UI初期化"""
@@ -362,17 +463,21 @@ class MusePowerViewer(QtWidgets.QMainWindow):
             self.status_label.setText(f'Status: Connection error - {str(e)}')
             print(f"Connection error: {e}")
     
-    def _unpack_eeg_channel(self, packet):
-        """EEGデータアンパック処理"""
-        aa = bitstring.Bits(bytes=packet)
-        pattern = "uint:16,uint:12,uint:12,uint:12,uint:12,uint:12,uint:12, \
-                   uint:12,uint:12,uint:12,uint:12,uint:12,uint:12"
-        
-        res = aa.unpack(pattern)
-        packet_index = res[0]
-        data = res[1:]
-        data = 0.48828125 * (np.array(data) - 2048)
-        return packet_index, data
+    def _unpack_eeg_channel(self, packet, out=None):
+        """EEGデータアンパック処理（outを渡すとそこへ直接書き込む）"""
+        buf = np.frombuffer(packet, dtype=np.uint8)
+        packet_index = (int(buf[0]) << 8) | int(buf[1])
+        
+        # 3バイトごとに12ビットサンプルが2つ詰められている
+        payload = buf[2:20].reshape(6, 3).astype(np.uint16)
+        samples = np.empty(12, dtype=np.uint16)
+        samples[0::2] = (payload[:, 0] << 4) | (payload[:, 1] >> 4)
+        samples[1::2] = ((payload[:, 1] & 0x0F) << 8) | payload[:, 2]
+        if out is None:
+            out = np.empty(12, dtype=np.float32)
+        np.subtract(samples, 2048, out=out, dtype=np.float32)
+        out *= np.float32(0.48828125)
+        return packet_index, out
     
     def _init_timestamp_correction(self):
         """タイムスタンプ補正初期化"""
@@ -394,25 +499,34 @@ class MusePowerViewer(QtWidgets.QMainWindow):
         self._P = P
     
     def _handle_eeg(self, sender, data):
-        """EEGデータハンドラー"""
+        """EEGデータハンドラー（受信データをキューに積むだけ）"""
+        self._raw_q.put_nowait((sender.uuid, time.time(), bytes(data)))
+    
+    def _decoder_loop(self, raw_q):
+        """デコードスレッド：自分用のキューからパケットを取り出して処理"""
+        while True:
+            item = raw_q.get()
+            if item is None:
+                break
+            self._process_eeg(*item)
+    
+    def _process_eeg(self, sender_uuid, timestamp, data):
+        """EEGパケット処理（デコードスレッドで実行）"""
         if self.first_sample:
             self._init_timestamp_correction()
             self.first_sample = False
         
-        timestamp = time.time()
-        
-        sender_uuid = str(sender.uuid)
+        sender_uuid = str(sender_uuid)
         if sender_uuid not in self.uuid_to_handle:
             return
         
         handle = self.uuid_to_handle[sender_uuid]
         index = int((handle - 32) / 3)
-        tm, d = self._unpack_eeg_channel(data)
+        tm, _ = self._unpack_eeg_channel(data, out=self.data[index])
         
         if self.last_tm == 0:
             self.last_tm = tm - 1
         
-        self.data[index] = d
         self.timestamps[index] = timestamp
         
         # AF7（handle 35）を最後に受信したら処理
@@ -423,30 +537,49 @@ class MusePowerViewer(QtWidgets.QMainWindow):
             
             self.last_tm = tm
             
-            idxs = np.arange(0, 12) + self.sample_index
+            last_idx = self.sample_index + 11
             self.sample_index += 12
             
-            self._update_timestamp_correction(idxs[-1], np.nanmin(self.timestamps))
+            self._update_timestamp_correction(last_idx, np.nanmin(self.timestamps))
             
-            # データをバッファに追加
-            channels = ['TP9', 'AF7', 'AF8', 'TP10']
-            for i, channel in enumerate(channels):
-                if i < 4:
-                    for sample in self.data[i]:
-                        self.eeg_data[channel].append(sample)
+            # データをリングバッファに追加
+            with self._ring_lock:
+                self._append_samples(self.data[:4])
             
             self.sample_count += 12
             
-            # データリセット
-            self.timestamps = np.full(5, np.nan)
-            self.data = np.zeros((5, 12))
+            # データリセット（再確保せずにその場で初期化）
+            self.timestamps.fill(np.nan)
+            self.data.fill(0.0)
+    
+    def _append_samples(self, block):
+        """(4, n)ブロックをリングバッファに書き込み（_ring_lock取得済みで呼ぶ）"""
+        n = block.shape[1]
+        pos = self.eeg_write % self.buffer_size
+        end = pos + n
+        if end <= self.buffer_size:
+            self.eeg_ring[:, pos:end] = block
+        else:
+            split = self.buffer_size - pos
+            self.eeg_ring[:, pos:] = block[:, :split]
+            self.eeg_ring[:, :end - self.buffer_size] = block[:, split:]
+        self.eeg_write += n
+    
+    def get_window(self, ch_idx, n):
+        """直近nサンプルを時系列順にコピーして取得"""
+        with self._ring_lock:
+            n = min(n, self.eeg_write, self.buffer_size)
+            end = self.eeg_write % self.buffer_size
+            start = end - n
+            if start >= 0:
+                return self.eeg_ring[ch_idx, start:end].copy()
+            return np.concatenate((self.eeg_ring[ch_idx, start:], self.eeg_ring[ch_idx, :end]), axis=-1)
     
     def _write_cmd_str(self, cmd):
         """コマンド送信"""
-        async def write_async():
-            cmd_bytes = [len(cmd) + 1, *(ord(char) for char in cmd), ord('\n')]
-            await self.client.write_gatt_char(MUSE_GATT_ATTR_STREAM_TOGGLE, bytearray(cmd_bytes), response=False)
-        return asyncio.create_task(write_async())
+        payload = bytes([len(cmd) + 1]) + cmd.encode('ascii') + b'\n'
+        return asyncio.create_task(
+            self.client.write_gatt_char(MUSE_GATT_ATTR_STREAM_TOGGLE, payload, response=False))
     
     @qasync.asyncSlot()
     async def start_streaming(self):
@@ -467,6 +600,12 @@ class MusePowerViewer(QtWidgets.QMainWindow):
                 MUSE_GATT_ATTR_RIGHTAUX
             ]
             
+            # デコードスレッド開始（スレッドごとに新しいキューを渡し、前回のスレッドと取り合わないようにする）
+            if self._decoder_thread is None:
+                self._raw_q = queue.SimpleQueue()
+                self._decoder_thread = threading.Thread(target=self._decoder_loop, args=(self._raw_q,), daemon=True)
+                self._decoder_thread.start()
+            
             for char_uuid in eeg_characteristics:
                 try:
                     await self.client.start_notify(char_uuid, self._handle_eeg)
@@ -486,14 +625,14 @@ class MusePowerViewer(QtWidgets.QMainWindow):
             self.start_time = time.time()
             self.sample_count = 0
             self.last_power_calc = 0
+            self._tick = 0
             
             # UI更新
             self.start_button.setEnabled(False)
             self.stop_button.setEnabled(True)
             
             # タイマー開始
-            self.plot_timer.start(100)    # 10 FPS for plots
-            self.power_timer.start(500)   # 0.5秒毎にパワー計算
+            self.plot_timer.start(100)    # 10 FPS for plots（パワー計算は0.5秒毎）
             
             self.status_label.setText('Status: Streaming active')
             print("✅ EEG power analysis started")
@@ -509,7 +648,6 @@ class MusePowerViewer(QtWidgets.QMainWindow):
             try:
                 # タイマー停止
                 self.plot_timer.stop()
-                self.power_timer.stop()
                 
                 if self.client and self.client.is_connected:
                     await self._write_cmd_str('h')
@@ -529,6 +667,13 @@ class MusePowerViewer(QtWidgets.QMainWindow):
                         except:
                             pass
                 
+                # デコードスレッド停止（キューに残ったパケットを処理してから終了）
+                # 再開時に2つのデコードスレッドが並走しないよう、終了を待ってから参照を外す
+                if self._decoder_thread is not None:
+                    self._raw_q.put_nowait(None)
+                    await asyncio.to_thread(self._decoder_thread.join, 1.0)
+                    self._decoder_thread = None
+                
                 self.is_streaming = False
                 self.status_label.setText('Status: Streaming stopped')
                 
@@ -549,26 +694,31 @@ class MusePowerViewer(QtWidgets.QMainWindow):
         channels = ['TP9', 'AF7', 'AF8', 'TP10']
         current_powers = {}
         
-        for channel in channels:
-            data_length = len(self.eeg_data[channel])
+        data_length = min(self.eeg_write, self.buffer_size)
+        
+        # 最低1秒分のデータが必要（256サンプル）
+        if data_length >= self.power_analyzer.window_samples:
+            # 4チャンネル分の窓を(4, N)行列として一括計算
+            signals = self.get_window(slice(None), self.power_analyzer.window_samples)
             
-            # 最低1秒分のデータが必要（256サンプル）
-            if data_length >= self.power_analyzer.window_samples:
-                # データの統計情報を表示（デバッグ）
-                if self.last_power_calc < 3:
-                    recent_data = list(self.eeg_data[channel])[-100:]  # 最新100サンプル
-                    print(f"Channel {channel}: {data_length} samples, recent range: [{np.min(recent_data):.1f}, {np.max(recent_data):.1f}]")
-                
-                powers = self.power_analyzer.calculate_band_power(self.eeg_data[channel])
-                
-                # パワーデータに追加
-                for band in ['theta', 'alpha', 'beta']:
-                    self.power_data[channel][band].append(powers[band])
-                
-                current_powers[channel] = powers
-            else:
-                # データが不足している場合の情報表示
-                if self.last_power_calc < 5:
+            # データの統計情報を表示（デバッグ）
+            if DEBUG:
+                recent = signals[:, -100:]  # 最新100サンプル
+                for i, channel in enumerate(channels):
+                    print(f"Channel {channel}: {data_length} samples, recent range: [{recent[i].min():.1f}, {recent[i].max():.1f}]")
+            band_powers = self.power_analyzer.calculate_band_powers_batch(signals)
+            
+            # パワー履歴に追加（4チャンネル × 3帯域を一括書き込み）
+            band_matrix = np.stack([band_powers[band] for band in ['theta', 'alpha', 'beta']], axis=-1)
+            self.power_hist[:, :, self.power_hist_w % self.power_history_size] = band_matrix
+            self.power_hist_w += 1
+            
+            for i, channel in enumerate(channels):
+                current_powers[channel] = {band: band_powers[band][i] for band in ['theta', 'alpha', 'beta']}
+        else:
+            # データが不足している場合の情報表示
+            if DEBUG:
+                for channel in channels:
                     print(f"Channel {channel}: Not enough data - {data_length}/{self.power_analyzer.window_samples}")
         
         # 現在のパワー値を表示（より読みやすい形式）
@@ -593,30 +743,42 @@ class MusePowerViewer(QtWidgets.QMainWindow):
         if not self.is_streaming:
             return
         
+        # power_calc_everyティックに1回パワー計算
+        self._tick = (self._tick + 1) % self.power_calc_every
+        power_updated = self._tick == 0
+        if power_updated:
+            self.calculate_powers()
+        
         # 統計更新
         if self.start_time:
             elapsed = time.time() - self.start_time
             rate = self.sample_count / elapsed if elapsed > 0 else 0
             self.stats_label.setText(f'Samples: {self.sample_count} | Rate: {rate:.1f} Hz | Power Updates: {self.last_power_calc}')
         
+        # 新しいサンプルもパワー更新もなければ再描画しない
+        if self.sample_count == self._last_drawn_samples and not power_updated:
+            return
+        self._last_drawn_samples = self.sample_count
+        
         channels = ['TP9', 'AF7', 'AF8', 'TP10']
         
         # 波形プロット更新（簡略版）
-        for channel in channels:
-            data = np.array(self.eeg_data[channel])
-            if len(data) > 0:
-                # 最新256サンプル（1秒分）のみ表示
-                display_data = data[-256:] if len(data) >= 256 else data
-                x = np.arange(len(display_data))
-                self.wave_curves[channel].setData(x, display_data)
-        
-        # パワープロット更新
-        for channel in channels:
-            for band in ['theta', 'alpha', 'beta']:
-                power_values = np.array(self.power_data[channel][band])
-                if len(power_values) > 0:
-                    x = np.arange(len(power_values))
-                    self.power_curves[channel][band].setData(x, power_values)
+        # 最新256サンプル（1秒分）を一括取得し、表示用に間引く
+        wave_data = self.get_window(slice(None), 256)[:, ::self.wave_decimation]
+        n_wave = wave_data.shape[1]
+        if n_wave > 0:
+            for i, channel in enumerate(channels):
+                self.wave_curves[channel].setData(self._wave_x[:n_wave], wave_data[i])
+        
+        # パワープロット更新（リングバッファを時系列順に並べ替えて一度だけコピー）
+        n_hist = min(self.power_hist_w, self.power_history_size)
+        if n_hist > 0:
+            pos = self.power_hist_w % self.power_history_size
+            hist = np.concatenate((self.power_hist[..., pos:], self.power_hist[..., :pos]), axis=-1)[..., -n_hist:]
+            x = np.arange(n_hist)
+            for i, channel in enumerate(channels):
+                for j, band in enumerate(['theta', 'alpha', 'beta']):
+                    self.power_curves[channel][band].setData(x, hist[i, j])
     
     async def disconnect(self):
         """デバイス切断"""
@@ -637,6 +799,7 @@ class MusePowerViewer(QtWidgets.QMainWindow):
 class MusePowerApp:
     def __init__(self):
         self.app = QtWidgets.QApplication(sys.argv)
+        warmup_jit()
         
         # pyqtgraph設定
         pg.setConfigOption('background', 'w')
@@ -9,7 +9,6 @@ import asyncio
 import numpy as np
 import time
 import struct
-import bitstring
 from collections import deque
 from PyQt5 import QtWidgets, QtCore, QtGui
 import pyqtgraph as pg
@@ -428,12 +427,10 @@ class MuseRaceGame(QtWidgets.QMainWindow):
 
     def _unpack_eeg_channel(self, packet):
         """EEGデータアンパック"""
-        aa = bitstring.Bits(bytes=packet)
-        pattern = "uint:16,uint:12,uint:12,uint:12,uint:12,uint:12,uint:12, \
-                   uint:12,uint:12,uint:12,uint:12,uint:12,uint:12"
-        res = aa.unpack(pattern)
-        packet_index = res[0]
-        data = res[1:]
+        # 先頭16bitがパケット番号、続く18byteに12bit×12サンプル
+        packet_index = int.from_bytes(packet[0:2], 'big')
+        v = int.from_bytes(packet[2:20], 'big')
+        data = [(v >> s) & 0xFFF for s in range(132, -1, -12)]
         data = 0.48828125 * (np.array(data) - 2048)
         return packet_index, data
 
@@ -10,15 +10,26 @@ os.environ['OBJC_DISABLE_INITIALIZE_FORK_SAFETY'] = 'YES'
 import sys
 import asyncio
 import numpy as np
+import math
 import time
+import random
 import struct
-import bitstring
+import threading
+from bisect import bisect_right
 from collections import deque
 from PyQt5 import QtWidgets, QtCore, QtGui
 import pyqtgraph as pg
 from bleak import BleakScanner, BleakClient
 import qasync
 from scipy import signal as scipy_signal
+from scipy.fft import rfft, rfftfreq
+
+# Numbaがインストールされていればパケット処理をJITコンパイル
+try:
+    from numba import njit
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
 
 # Muse constants
 MUSE_SAMPLING_EEG_RATE = 256
@@ -29,17 +40,93 @@ MUSE_GATT_ATTR_AF8 = '273e0005-4c4d-454d-96be-f03bac821358'
 MUSE_GATT_ATTR_TP10 = '273e0006-4c4d-454d-96be-f03bac821358'
 MUSE_GATT_ATTR_RIGHTAUX = '273e0007-4c4d-454d-96be-f03bac821358'
 
+# 棒グラフ用の対数スケール（EEGパワーの典型的な範囲 10^2 〜 10^8 を0-100にマッピング）
+POWER_LOG_MIN = math.log10(1e2)
+POWER_LOG_MAX = math.log10(1e8)
+POWER_LOG_SCALE = 100.0 / (POWER_LOG_MAX - POWER_LOG_MIN)
+
+# 12ビットの生値 → μV の変換表（0.48828125 * (x - 2048) を4096通り事前計算）
+_EEG_LUT = (np.arange(4096, dtype=np.int32) - 2048).astype(np.float32) * np.float32(0.48828125)
+
+def _unpack_eeg_packet(buf, out):
+    """EEGパケット（uint8×20）をアンパックしてoutに書き込み、パケット番号を返す"""
+    for k in range(12):
+        # サンプルkはビット位置16+12kから始まる12ビット値
+        i = 2 + (12 * k) // 8
+        word = (np.uint16(buf[i]) << 8) | np.uint16(buf[i + 1])
+        if k % 2 == 0:
+            word >>= 4
+        out[k] = _EEG_LUT[word & 0xFFF]
+    return (int(buf[0]) << 8) | int(buf[1])
+
+def _kalman_update(P, R, t_source, t_receiver):
+    """タイムスタンプ補正の逐次最小二乗更新（P, Rを返す）"""
+    P = P - ((P**2) * (t_source**2)) / (1 - (P * (t_source**2)))
+    R = R + P * t_source * (t_receiver - t_source * R)
+    return P, R
+
+def _reduce_bands(power, band_lo, band_hi, out):
+    """帯域ごとに左右のパワーを合計（power: (2, ビン数)、out: (3, 帯域数) → 左, 右, 平均）"""
+    for b in range(band_lo.shape[0]):
+        left = 0.0
+        right = 0.0
+        for k in range(band_lo[b], band_hi[b]):
+            left += power[0, k]
+            right += power[1, k]
+        out[0, b] = left
+        out[1, b] = right
+        out[2, b] = (left + right) / 2.0
+
+if HAS_NUMBA:
+    _unpack_eeg_packet = njit(cache=True)(_unpack_eeg_packet)
+    _kalman_update = njit(cache=True, fastmath=True)(_kalman_update)
+    _reduce_bands = njit(cache=True, fastmath=True)(_reduce_bands)
+
+def _build_eeg_unpacker():
+    """Numbaがない場合のアンパック関数を生成（20バイト固定レイアウトに特化してループを展開）"""
+    # ペイロード18バイトを144ビット整数として読み、サンプルkは上位から12ビットずつ取り出す
+    lines = [
+        'def _unpack_eeg_unrolled(packet):',
+        "    v = int.from_bytes(packet[2:20], 'big')",
+        '    data = np.array([',
+    ]
+    for k in range(12):
+        lines.append(f'        lut[(v >> {132 - 12 * k}) & 0xFFF],')
+    lines += [
+        '    ], dtype=np.float32)',
+        '    return (packet[0] << 8) | packet[1], data',
+    ]
+    # 変換表はPythonのリストで引く方が要素アクセスが速い
+    namespace = {'np': np, 'lut': _EEG_LUT.tolist()}
+    exec('\n'.join(lines), namespace)
+    return namespace['_unpack_eeg_unrolled']
+
+_unpack_eeg_unrolled = _build_eeg_unpacker()
+
+def warmup_jit():
+    """JIT関数を一度呼んでおき、最初のBLEパケットでコンパイル待ちが発生しないようにする"""
+    if HAS_NUMBA:
+        # 実際の呼び出しと同じくnp.frombufferの読み取り専用配列を渡す（書き込み可能だと別シグネチャになる）
+        _unpack_eeg_packet(np.frombuffer(bytes(20), dtype=np.uint8), np.empty(12, dtype=np.float32))
+        _kalman_update(1e-4, 1.0 / MUSE_SAMPLING_EEG_RATE, 12.0, 0.05)
+        _reduce_bands(np.zeros((2, 8), dtype=np.float32), np.array([0], dtype=np.int64),
+                      np.array([4], dtype=np.int64), np.empty((3, 1)))
+
 class BrainwaveAnalyzer:
     """リアルタイム脳波解析クラス"""
 
     def __init__(self, window_size=256):
         self.window_size = window_size
-        self.eeg_buffer = {
-            'TP9': deque(maxlen=window_size),
-            'AF7': deque(maxlen=window_size),
-            'AF8': deque(maxlen=window_size),
-            'TP10': deque(maxlen=window_size)
-        }
+        # EEGリングバッファ（行: TP9, AF7, AF8, TP10、書き込み位置は全チャンネル共通）
+        self.channels = ('TP9', 'AF7', 'AF8', 'TP10')
+        self.eeg_buffer = np.zeros((len(self.channels), window_size), dtype=np.float32)
+        self.write_pos = 0  # 次に書き込む列
+        self.total_samples = 0  # チャンネルあたりの累積サンプル数
+        # バッファ内サンプルの合計・二乗和（標準偏差をO(1)で求めるため逐次更新）
+        self._sum = np.zeros(len(self.channels))
+        self._sumsq = np.zeros(len(self.channels))
+        # 左右平均（行: 左, 右）を書き込むスクラッチバッファ
+        self._lr_scratch = np.empty((2, window_size), dtype=np.float32)
 
         # 周波数帯域定義
         self.bands = {
@@ -50,45 +137,156 @@ class BrainwaveAnalyzer:
             'gamma': (30, 49)
         }
 
+        # 窓長が固定なので周波数軸と帯域インデックス範囲は事前計算しておく
+        self.fft_freq = rfftfreq(window_size, 1.0 / MUSE_SAMPLING_EEG_RATE)
+        self.band_slices = {
+            band_name: slice(int(np.searchsorted(self.fft_freq, low_freq, side='left')),
+                             int(np.searchsorted(self.fft_freq, high_freq, side='right')))
+            for band_name, (low_freq, high_freq) in self.bands.items()
+        }
+        self._band_lo = np.array([sl.start for sl in self.band_slices.values()], dtype=np.int64)
+        self._band_hi = np.array([sl.stop for sl in self.band_slices.values()], dtype=np.int64)
+        self._band_out = np.empty((3, len(self.bands)))  # 帯域パワー（左, 右, 平均）
+        # 帯域の上限（49Hz）より上のビンは使わないのでパワー計算を省く
+        self._max_bin = max(band_slice.stop for band_slice in self.band_slices.values())
+        # |X|^2 計算用バッファ（毎回確保しない）
+        self._power_buf = np.empty((2, self._max_bin), dtype=np.float32)
+        self._power_tmp = np.empty((2, self._max_bin), dtype=np.float32)
+
+        # ハニング窓（窓掛けによるエネルギー減少を補正して、矩形窓と同程度のパワー値に揃える）
+        self._hann = scipy_signal.windows.hann(window_size, sym=False).astype(np.float32)
+        self._power_scale = np.float32(window_size / (self._hann.astype(np.float64) ** 2).sum())
+
         self.last_powers = {band: 0.0 for band in self.bands.keys()}
+        # 棒グラフ表示用の左右パワー（θ左, θ右, α左, α右, β左, β右 の順）
+        self.last_powers_arr = np.zeros(6)
+        self._bar_band_idx = [list(self.bands).index(band) for band in ('theta', 'alpha', 'beta')]
+
+        # 計算結果のキャッシュ（新しいサンプルが追加されるまで再計算しない）
+        self._powers_gen = -1  # last_powers計算時のtotal_samples
+        self._lr_power = None
+        self._lr_power_gen = -1  # _lr_power計算時のtotal_samples
+
+    def add_samples_batch(self, block):
+        """4チャンネル分のサンプル（(4, n)）をまとめてバッファに追加"""
+        n = block.shape[1]
+        if n > self.window_size:
+            # 窓長を超える分は古いサンプルなので捨てる
+            self.total_samples += n - self.window_size
+            self.write_pos = (self.write_pos + n - self.window_size) % self.window_size
+            block = block[:, -self.window_size:]
+            n = self.window_size
+
+        start = self.write_pos
+        end = start + n
+        if end < self.window_size:
+            # 上書きされる古いサンプルの分を合計から引いて、新しいサンプルの分を足す
+            old = self.eeg_buffer[:, start:end]
+            self._sum -= old.sum(axis=1, dtype=np.float64)
+            self._sumsq -= np.square(old, dtype=np.float64).sum(axis=1)
+            self.eeg_buffer[:, start:end] = block
+            self._sum += block.sum(axis=1, dtype=np.float64)
+            self._sumsq += np.square(block, dtype=np.float64).sum(axis=1)
+        else:
+            first = self.window_size - start
+            self.eeg_buffer[:, start:] = block[:, :first]
+            self.eeg_buffer[:, :end - self.window_size] = block[:, first:]
+            # バッファが一周したら合計を計算し直す（逐次更新の丸め誤差をリセット）
+            self._sum = self.eeg_buffer.sum(axis=1, dtype=np.float64)
+            self._sumsq = np.square(self.eeg_buffer, dtype=np.float64).sum(axis=1)
+        self.write_pos = end % self.window_size
+        self.total_samples += n
+
+    def get_stds(self):
+        """各チャンネルのバッファ内サンプルの標準偏差（np.stdと同じ母標準偏差）"""
+        n = self.num_samples()
+        if n == 0:
+            return np.zeros(len(self.channels))
+        mean = self._sum / n
+        return np.sqrt(np.maximum(self._sumsq / n - mean * mean, 0.0))
+
+    def num_samples(self):
+        """バッファ内の有効サンプル数（チャンネルあたり）"""
+        return min(self.total_samples, self.window_size)
+
+    def is_ready(self):
+        """全チャンネルのデータが窓長分揃っているか"""
+        return self.total_samples >= self.window_size
+
+    def get_window(self):
+        """全チャンネルの窓を時系列順に並べて返す（(4, window_size)）"""
+        start = self.write_pos
+        if start == 0:
+            return self.eeg_buffer
+        return np.concatenate((self.eeg_buffer[:, start:], self.eeg_buffer[:, :start]), axis=1)
+
+    def get_lr_average(self):
+        """左右チャンネル平均を時系列順にスクラッチバッファへ書き込んで返す（(2, window_size)）"""
+        out = self._lr_scratch
+        # (TP9, AF7), (AF8, TP10) の組に分けて、並べ替えと加算を同時に行う
+        start = self.write_pos
+        tail = self.window_size - start
+        pairs = self.eeg_buffer.reshape(2, 2, self.window_size)
+        np.add(pairs[:, 0, start:], pairs[:, 1, start:], out=out[:, :tail])
+        np.add(pairs[:, 0, :start], pairs[:, 1, :start], out=out[:, tail:])
+        out *= np.float32(0.5)
+        return out
+
+    def _compute_lr_power(self):
+        """左右平均信号のパワースペクトルを計算（(2, 使用する周波数ビン数)）"""
+        if self._lr_power_gen == self.total_samples:
+            return self._lr_power
 
-    def add_samples(self, channel, samples):
-        """サンプルをバッファに追加"""
-        for sample in samples:
-            self.eeg_buffer[channel].append(sample)
+        # 左側: TP9（左耳後ろ）+ AF7（左前額）の平均
+        # 右側: AF8（右前額）+ TP10（右耳後ろ）の平均
+        lr = self.get_lr_average()
+        # 平均除去 + 窓掛け（スクラッチバッファ上でその場計算）
+        lr -= lr.mean(axis=1, keepdims=True)
+        lr *= self._hann
+        # 左右まとめてFFT（|X|^2 は実部・虚部から直接計算）
+        # スクラッチバッファは使い捨てなので上書きを許可、2×256点程度ではスレッド分割しない
+        spectrum = rfft(lr, axis=1, workers=1, overwrite_x=True)[:, :self._max_bin]
+        power = self._power_buf
+        np.multiply(spectrum.real, spectrum.real, out=power)
+        np.multiply(spectrum.imag, spectrum.imag, out=self._power_tmp)
+        power += self._power_tmp
+        power *= self._power_scale
+        self._lr_power = power
+        self._lr_power_gen = self.total_samples
+        return power
 
     def compute_band_powers(self):
         """周波数帯域ごとのパワーを計算（左右チャンネルを平均してからパワー計算）"""
         # 全チャンネルのデータが揃っているか確認
-        for channel in ['TP9', 'AF7', 'AF8', 'TP10']:
-            if len(self.eeg_buffer[channel]) < self.window_size:
-                return self.last_powers
+        if not self.is_ready() or self._powers_gen == self.total_samples:
+            return self.last_powers
 
-        # 左右チャンネルの平均を計算
-        # 左側: TP9（左耳後ろ）+ AF7（左前額）の平均
-        left_data = (np.array(self.eeg_buffer['TP9']) + np.array(self.eeg_buffer['AF7'])) / 2.0
-        # 右側: AF8（右前額）+ TP10（右耳後ろ）の平均
-        right_data = (np.array(self.eeg_buffer['AF8']) + np.array(self.eeg_buffer['TP10'])) / 2.0
+        # 左右チャンネル（平均後）のパワースペクトル
+        power = self._compute_lr_power()
 
-        # 左チャンネル（平均後）のFFT計算
-        left_fft = np.fft.rfft(left_data)
-        fft_freq = np.fft.rfftfreq(len(left_data), 1.0 / MUSE_SAMPLING_EEG_RATE)
-        left_power = np.abs(left_fft) ** 2
+        # 各周波数帯域のパワーを計算（左右別々 + 平均）
+        out = self._band_out
+        if HAS_NUMBA:
+            _reduce_bands(power, self._band_lo, self._band_hi, out)
+        else:
+            # 累積和の差で全帯域をまとめて計算
+            csum = np.zeros((2, power.shape[1] + 1))
+            np.cumsum(power, axis=1, out=csum[:, 1:])
+            out[:2] = csum[:, self._band_hi] - csum[:, self._band_lo]
+            out[2] = (out[0] + out[1]) / 2.0
 
-        # 右チャンネル（平均後）のFFT計算
-        right_fft = np.fft.rfft(right_data)
-        right_power = np.abs(right_fft) ** 2
+        # 棒グラフ用の配列を更新（(帯域, 左右) の順に並べる）
+        self.last_powers_arr[:] = out[:2, self._bar_band_idx].T.ravel()
 
-        # 各周波数帯域のパワーを計算（左右別々）
         powers = {}
-        for band_name, (low_freq, high_freq) in self.bands.items():
-            idx = np.logical_and(fft_freq >= low_freq, fft_freq <= high_freq)
-            powers[f'{band_name}_left'] = np.sum(left_power[idx])
-            powers[f'{band_name}_right'] = np.sum(right_power[idx])
+        for band_name, left, right, mean in zip(self.bands, *out.tolist()):
+            powers[f'{band_name}_left'] = left
+            powers[f'{band_name}_right'] = right
             # 平均も保存（集中度計算用）
-            powers[band_name] = (powers[f'{band_name}_left'] + powers[f'{band_name}_right']) / 2.0
+            powers[band_name] = mean
 
         self.last_powers = powers
+        self._powers_gen = self.total_samples
         return powers
 
     def get_focus_score(self):
@@ -103,7 +301,7 @@ class BrainwaveAnalyzer:
             return 0.0
         focus = beta / (alpha + theta)
         # 0-1の範囲に正規化（経験的な係数）
-        focus_normalized = np.clip(focus / 2.0, 0.0, 1.0)
+        focus_normalized = min(1.0, max(0.0, focus * 0.5))
         return focus_normalized
 
         # # 【新指標】β波 / α波
@@ -155,7 +353,7 @@ class BrainwaveAnalyzer:
             focus_left = 0.0
         else:
             focus_left = beta_left / alpha_left
-            focus_left = np.clip(focus_left / 10.0, 0.0, 1.0)
+            focus_left = min(1.0, max(0.0, focus_left * 0.1))
 
         # 右チャンネルの集中度
         beta_right = powers.get('beta_right', 0)
@@ -165,33 +363,18 @@ class BrainwaveAnalyzer:
             focus_right = 0.0
         else:
             focus_right = beta_right / alpha_right
-            focus_right = np.clip(focus_right / 10.0, 0.0, 1.0)
+            focus_right = min(1.0, max(0.0, focus_right * 0.1))
 
         return focus_left, focus_right
 
     def compute_lateral_bias(self):
         """左右チャンネルのβパワー対数比率を計算（チャンネル平均使用）"""
-        # 全チャンネルのデータが揃っているか確認
-        for channel in ['TP9', 'AF7', 'AF8', 'TP10']:
-            if len(self.eeg_buffer[channel]) < self.window_size:
-                return 0.0
-
-        # 左右チャンネルの平均を計算
-        # 左側: TP9（左耳後ろ）+ AF7（左前額）の平均
-        left_data = (np.array(self.eeg_buffer['TP9']) + np.array(self.eeg_buffer['AF7'])) / 2.0
-        # 右側: AF8（右前額）+ TP10（右耳後ろ）の平均
-        right_data = (np.array(self.eeg_buffer['AF8']) + np.array(self.eeg_buffer['TP10'])) / 2.0
-
-        # 各チャンネル（平均後）のFFT計算
-        left_fft = np.fft.rfft(left_data)
-        right_fft = np.fft.rfft(right_data)
-        fft_freq = np.fft.rfftfreq(len(left_data), 1.0 / MUSE_SAMPLING_EEG_RATE)
-
-        # βバンド（13-30Hz）のパワーを計算
-        # beta_idx = np.logical_and(fft_freq >= 30, fft_freq <= 49)
-        beta_idx = np.logical_and(fft_freq >= 13, fft_freq <= 30)
-        left_beta = np.sum(np.abs(left_fft[beta_idx]) ** 2)
-        right_beta = np.sum(np.abs(right_fft[beta_idx]) ** 2)
+        # βバンド（13-30Hz）のパワーは帯域パワー計算の結果を再利用
+        powers = self.compute_band_powers()
+        # left_beta = powers.get('gamma_left', 0.0)
+        # right_beta = powers.get('gamma_right', 0.0)
+        left_beta = powers.get('beta_left', 0.0)
+        right_beta = powers.get('beta_right', 0.0)
 
         # βパワーの対数比率を計算
         # 負の値: 左のβが強い、正の値: 右のβが強い
@@ -201,23 +384,28 @@ class BrainwaveAnalyzer:
         # 対数比率: log(右β/左β)
         # 範囲: -∞ 〜 +∞、0 = 等しい
         ratio = right_beta / left_beta
-        bias = np.log(ratio)
+        bias = math.log(ratio)
 
         # -1.0 〜 +1.0 の範囲にクリップ（しきい値判定用）
-        bias = np.clip(bias, -1.0, 1.0)
+        bias = min(1.0, max(-1.0, bias))
 
         return bias
 
 class RaceGame(QtWidgets.QWidget):
     """レースゲーム画面"""
 
+    MAX_OBSTACLES = 64  # 同時に存在できる障害物の最大数
+
     def __init__(self):
         super().__init__()
         # 3レーンシステム
         self.current_lane = 1  # 0=左、1=中央、2=右
         self.speed = 0.0  # 現在のスピード
         self.distance = 0.0  # 走行距離
-        self.obstacles = []  # 障害物リスト（[lane_index, y_pos]の形式）
+        # 障害物（レーン番号とY座標比率を別々の固定長配列で保持、先頭_nobs個が有効）
+        self._obs_lane = np.empty(self.MAX_OBSTACLES, dtype=np.int8)
+        self._obs_y = np.empty(self.MAX_OBSTACLES, dtype=np.float32)
+        self._nobs = 0
         self.game_over = False
         self.game_clear = False  # ゲームクリア
         self.score = 0
@@ -241,6 +429,7 @@ class RaceGame(QtWidgets.QWidget):
         self.last_obstacle_lane = -1  # 最後に障害物を配置したレーン
         self.obstacle_cooldown = 0  # 障害物生成のクールダウン
         self.tutorial_mode = False  # チュートリアルモード
+        self.debug = False  # Trueで衝突判定のデバッグ出力を表示
 
         # 色設定
         self.road_color = QtGui.QColor(80, 80, 80)
@@ -248,8 +437,47 @@ class RaceGame(QtWidgets.QWidget):
         self.obstacle_color = QtGui.QColor(100, 100, 200)
         self.line_color = QtGui.QColor(255, 255, 255)
 
+        # 描画用のペン・フォント・色（paintEventのたびに生成しないようにキャッシュ）
+        self._grass_color = QtGui.QColor(50, 150, 50)
+        self._lane_pen = QtGui.QPen(QtCore.Qt.white, 2, QtCore.Qt.DashLine)
+        self._green_color = QtGui.QColor(0, 200, 0)
+        self._clear_pen = QtGui.QPen(self._green_color, 3)
+        self._clear_bg_color = QtGui.QColor(255, 255, 255, 230)  # 半透明の白
+        self._tutorial_font = QtGui.QFont('Arial', 20, QtGui.QFont.Bold)
+        self._time_font = QtGui.QFont('Arial', 28, QtGui.QFont.Bold)
+        self._banner_font = QtGui.QFont('Arial', 40, QtGui.QFont.Bold)
+        self._score_font = QtGui.QFont('Arial', 24)
+        self._obstacle_rects = []  # 障害物描画用QRectのプール（moveToで使い回す）
+
         self.setMinimumSize(300, 400)
         self.setFocusPolicy(QtCore.Qt.StrongFocus)  # キーボード入力を受け取る
+        self._update_geometry()
+
+    def _update_geometry(self):
+        """ウィジェットサイズから道路・レーン・車の座標を計算してキャッシュ"""
+        width = self.width()
+        height = self.height()
+
+        # 道路の幅（画面の70%）
+        self._road_width = int(width * 0.7)
+        self._road_left = int(width * 0.15)
+
+        # レーン区切り線（2本）
+        self._lane1_x = self._road_left + self._road_width // 3
+        self._lane2_x = self._road_left + 2 * self._road_width // 3
+
+        # 各レーンの中心X座標（障害物のレーン番号で直接インデックスできるよう配列で保持）
+        self._lane_positions = np.array([
+            self._road_left + self._road_width // 6,
+            self._road_left + self._road_width // 2,
+            self._road_left + 5 * self._road_width // 6
+        ])
+        self._car_y = int(height * 0.8)
+
+    def resizeEvent(self, event):
+        """サイズ変更時のみ描画用の座標を再計算"""
+        self._update_geometry()
+        super().resizeEvent(event)
 
     def keyPressEvent(self, event):
         """キーボード入力処理"""
@@ -266,6 +494,36 @@ class RaceGame(QtWidgets.QWidget):
 
         self.update()
 
+    def reset(self, tutorial_mode=None):
+        """ゲーム状態を初期化（tutorial_modeがNoneなら現在のモードを維持）"""
+        self.current_lane = 1
+        self.speed = 0.0
+        self.distance = 0.0
+        self.clear_obstacles()
+        self.game_over = False
+        self.game_clear = False
+        self.score = 0
+        self.last_obstacle_lane = -1
+        self.obstacle_cooldown = 0
+        self.bias_cooldown = 0
+        if tutorial_mode is not None:
+            self.tutorial_mode = tutorial_mode
+        self.remaining_time = self.time_limit
+        self.start_time = None
+
+    def clear_obstacles(self):
+        """障害物を全て削除"""
+        self._nobs = 0
+
+    def _spawn_obstacles(self, lanes):
+        """指定レーンの画面上端に障害物を追加"""
+        lanes = np.atleast_1d(lanes)
+        n = self._nobs
+        k = min(len(lanes), self.MAX_OBSTACLES - n)  # 上限を超える分は追加しない
+        self._obs_lane[n:n + k] = lanes[:k]
+        self._obs_y[n:n + k] = -0.08
+        self._nobs = n + k
+
     def update_game(self, focus_score, lateral_bias=0.0):
         """ゲーム状態を更新"""
         if self.game_over or self.game_clear:
@@ -332,23 +590,22 @@ class RaceGame(QtWidgets.QWidget):
         obstacle_prob = base_prob + score_factor
 
         # 障害物生成（チュートリアルモードでも生成するが、当たり判定は無効）
-        if self.obstacle_cooldown == 0 and np.random.random() < obstacle_prob:
+        if self.obstacle_cooldown == 0 and random.random() < obstacle_prob:
             # 現在画面上にある障害物のレーンを確認
             # より広い範囲（車2台分程度）のスペースを空ける
-            occupied_lanes = set()
-            for obs in self.obstacles:
-                if -0.1 <= obs[1] <= 0.4:  # 画面上部、車2台分程度のスペース
-                    occupied_lanes.add(obs[0])
+            obs_y = self._obs_y[:self._nobs]
+            near_top = (obs_y >= -0.1) & (obs_y <= 0.4)  # 画面上部、車2台分程度のスペース
+            occupied = np.bincount(self._obs_lane[:self._nobs][near_top], minlength=3) > 0
 
             # 利用可能なレーンを決定（占有されていないレーン）
-            available_lanes = [l for l in [0, 1, 2] if l not in occupied_lanes]
+            available_lanes = np.flatnonzero(~occupied).tolist()
 
             # 脳波操作モード、Easyモード、またはチュートリアルモードの場合は最大1つの障害物のみ
             if self.brain_control_enabled or self.difficulty_level == 'easy' or self.tutorial_mode:
                 if len(available_lanes) > 0:
                     # ランダムに1つのレーンを選択
-                    lane = np.random.choice(available_lanes)
-                    self.obstacles.append([lane, -0.08])
+                    lane = random.choice(available_lanes)
+                    self._spawn_obstacles(lane)
                     self.obstacle_cooldown = 30
             else:
                 # キーボード操作モードの場合は複数配置可能
@@ -358,48 +615,56 @@ class RaceGame(QtWidgets.QWidget):
                     pass
                 elif len(available_lanes) == 3:
                     # 全レーン空いている場合は、最大2レーンに配置
-                    num_obstacles = np.random.randint(1, 3)  # 1または2個
-                    selected_lanes = np.random.choice(available_lanes, num_obstacles, replace=False)
-                    for lane in selected_lanes:
-                        self.obstacles.append([lane, -0.08])
+                    num_obstacles = random.randint(1, 2)  # 1または2個
+                    selected_lanes = random.sample(available_lanes, num_obstacles)
+                    self._spawn_obstacles(selected_lanes)
                     self.obstacle_cooldown = 30
                 else:
                     # 一部のレーンが空いている場合
                     # 必ず1レーンは空けるため、最大で(available_lanes - 1)個まで配置
                     max_new_obstacles = max(1, len(available_lanes) - 1)
-                    num_obstacles = np.random.randint(1, max_new_obstacles + 1)
-                    selected_lanes = np.random.choice(available_lanes, num_obstacles, replace=False)
-                    for lane in selected_lanes:
-                        self.obstacles.append([lane, -0.08])
+                    num_obstacles = random.randint(1, max_new_obstacles)
+                    selected_lanes = random.sample(available_lanes, num_obstacles)
+                    self._spawn_obstacles(selected_lanes)
                     self.obstacle_cooldown = 30
 
-        # 障害物を移動と衝突判定
-        for obstacle in self.obstacles[:]:
-            # Y座標を比率で更新（スピードに応じて移動）
-            obstacle[1] += (self.speed * 2) / current_height
-
-            # 画面外に出たら削除（画面下部を超えたら）
-            if obstacle[1] > 1.0:
-                self.obstacles.remove(obstacle)
-                continue
-
-            # 衝突判定：同じレーンにいて、Y座標が近い場合（チュートリアルモードでは無効）
-            if not self.tutorial_mode and obstacle[0] == self.current_lane:
+        # 障害物を移動と衝突判定（全障害物をまとめて処理）
+        # Y座標を比率で更新（スピードに応じて移動）
+        n = self._nobs
+        obs_y = self._obs_y[:n]
+        obs_y += (self.speed * 2) / current_height
+
+        # 画面外に出たら削除（画面下部を超えたら）、残った障害物を先頭に詰める
+        alive = obs_y <= 1.0
+        if not alive.all():
+            n = int(np.count_nonzero(alive))
+            self._obs_lane[:n] = self._obs_lane[:self._nobs][alive]
+            self._obs_y[:n] = obs_y[alive]
+            self._nobs = n
+        obs_lane = self._obs_lane[:n]
+        obs_y = self._obs_y[:n]
+
+        # 衝突判定：同じレーンにいて、Y座標が近い場合（チュートリアルモードでは無効）
+        if not self.tutorial_mode:
+            same_lane = obs_lane == self.current_lane
+            if same_lane.any():
                 # 車のY座標（画面の80%位置）
                 car_y_ratio = 0.8
-                obs_y_ratio = obstacle[1]
-                distance_ratio = abs(obs_y_ratio - car_y_ratio)
+                distance_ratio = np.abs(obs_y - car_y_ratio)
 
-                # デバッグ出力
-                print(f"Same lane! Obstacle Y ratio: {obs_y_ratio:.3f}, Car Y ratio: {car_y_ratio:.3f}, Distance ratio: {distance_ratio:.3f}")
+                # デバッグ出力（毎フレーム出力されるため通常は無効）
+                if self.debug:
+                    for i in np.flatnonzero(same_lane):
+                        print(f"Same lane! Obstacle Y ratio: {obs_y[i]:.3f}, Car Y ratio: {car_y_ratio:.3f}, Distance ratio: {distance_ratio[i]:.3f}")
 
                 # 衝突判定の閾値（画面の高さに対する比率）
                 # 車の高さ60px + 障害物の高さ40px = 100px
                 # より厳しい判定にするため、閾値を小さくする
                 # 車の中心から±30px程度（合計60px）= 画面高さ600pxなら 0.05
                 collision_threshold_ratio = 0.05  # 0.1 → 0.05に変更
-                if distance_ratio < collision_threshold_ratio:
-                    print("COLLISION!")
+                if (same_lane & (distance_ratio < collision_threshold_ratio)).any():
+                    if self.debug:
+                        print("COLLISION!")
                     self.game_over = True
 
         self.update()
@@ -414,97 +679,144 @@ class RaceGame(QtWidgets.QWidget):
         height = self.height()
 
         # 背景（道路）
-        painter.fillRect(0, 0, width, height, QtGui.QColor(50, 150, 50))
+        painter.fillRect(0, 0, width, height, self._grass_color)
 
-        # 道路の幅を計算（画面の70%）
-        road_width = int(width * 0.7)
-        road_left = int(width * 0.15)
-        painter.fillRect(road_left, 0, road_width, height, self.road_color)
+        # 道路（座標はresizeEventでキャッシュ済み）
+        painter.fillRect(self._road_left, 0, self._road_width, height, self.road_color)
 
         # レーン区切り線（2本）
-        lane1_x = road_left + road_width // 3
-        lane2_x = road_left + 2 * road_width // 3
-        painter.setPen(QtGui.QPen(QtCore.Qt.white, 2, QtCore.Qt.DashLine))
-        painter.drawLine(lane1_x, 0, lane1_x, height)
-        painter.drawLine(lane2_x, 0, lane2_x, height)
-
-        # レーン位置を動的に計算
-        lane_positions = [
-            road_left + road_width // 6,
-            road_left + road_width // 2,
-            road_left + 5 * road_width // 6
-        ]
-        car_x = lane_positions[self.current_lane]
-        car_y = int(height * 0.8)
+        painter.setPen(self._lane_pen)
+        painter.drawLine(self._lane1_x, 0, self._lane1_x, height)
+        painter.drawLine(self._lane2_x, 0, self._lane2_x, height)
+
+        car_x = int(self._lane_positions[self.current_lane])
+        car_y = self._car_y
 
         # 車を描画
         painter.setBrush(self.car_color)
-        painter.drawRect(int(car_x) - 20, int(car_y) - 30, 40, 60)
+        painter.drawRect(car_x - 20, car_y - 30, 40, 60)
 
         # 障害物を描画
         painter.setBrush(self.obstacle_color)
-        for obs in self.obstacles:
-            # obs[0]はlane_index（0, 1, 2）
-            # obs[1]はy_ratio（0.0〜1.0）
-            lane_idx = obs[0]
-            obs_x = lane_positions[lane_idx]
-            obs_y = obs[1] * height  # 比率から実際のY座標に変換
-            painter.drawRect(int(obs_x) - 20, int(obs_y) - 20, 40, 40)
+        n_obstacles = self._nobs
+        if n_obstacles > 0:
+            # レーン番号（0, 1, 2）とY座標比率（0.0〜1.0）から左上座標をまとめて計算
+            obs_x = self._lane_positions[self._obs_lane[:n_obstacles]] - 20
+            obs_y = (self._obs_y[:n_obstacles] * height).astype(int) - 20  # 比率から実際のY座標に変換
+            while len(self._obstacle_rects) < n_obstacles:
+                self._obstacle_rects.append(QtCore.QRect(0, 0, 40, 40))
+            rects = self._obstacle_rects[:n_obstacles]
+            for rect, x, y in zip(rects, obs_x.tolist(), obs_y.tolist()):
+                rect.moveTo(x, y)
+            painter.drawRects(rects)
 
         # チュートリアルモード表示
         if self.tutorial_mode:
-            painter.setPen(QtGui.QColor(0, 200, 0))
-            painter.setFont(QtGui.QFont('Arial', 20, QtGui.QFont.Bold))
+            painter.setPen(self._green_color)
+            painter.setFont(self._tutorial_font)
             painter.drawText(int(width * 0.25), 50, 'TUTORIAL MODE')
         else:
             # 残り時間表示（通常モードのみ）
-            painter.setPen(QtGui.QColor(255, 255, 255))
-            painter.setFont(QtGui.QFont('Arial', 28, QtGui.QFont.Bold))
+            painter.setPen(self.line_color)
+            painter.setFont(self._time_font)
             time_text = f'Time: {self.remaining_time:.1f}s'
             painter.drawText(int(width * 0.35), 40, time_text)
 
         # ゲームオーバー表示
         if self.game_over:
             painter.setPen(QtCore.Qt.red)
-            painter.setFont(QtGui.QFont('Arial', 40, QtGui.QFont.Bold))
+            painter.setFont(self._banner_font)
             painter.drawText(int(width * 0.15), int(height * 0.5), 'GAME OVER!')
 
         # ゲームクリア表示
         if self.game_clear:
             # 白い背景を描画
             bg_rect = QtCore.QRect(int(width * 0.1), int(height * 0.3), int(width * 0.8), int(height * 0.3))
-            painter.fillRect(bg_rect, QtGui.QColor(255, 255, 255, 230))  # 半透明の白
+            painter.fillRect(bg_rect, self._clear_bg_color)  # 半透明の白
 
             # 枠線を描画
-            painter.setPen(QtGui.QPen(QtGui.QColor(0, 200, 0), 3))
+            painter.setPen(self._clear_pen)
             painter.drawRect(bg_rect)
 
             # テキストを描画
-            painter.setPen(QtGui.QColor(0, 200, 0))
-            painter.setFont(QtGui.QFont('Arial', 40, QtGui.QFont.Bold))
+            painter.setPen(self._green_color)
+            painter.setFont(self._banner_font)
             painter.drawText(int(width * 0.25), int(height * 0.42), 'GAME CLEAR!')
-            painter.setFont(QtGui.QFont('Arial', 24))
+            painter.setFont(self._score_font)
             painter.drawText(int(width * 0.32), int(height * 0.52), f'Score: {self.score}')
 
+class EEGWorker(QtCore.QThread):
+    """BLEで受信したEEGパケットをバックグラウンドで処理するスレッド"""
+
+    def __init__(self, process_packet, max_packets=256):
+        super().__init__()
+        self._process_packet = process_packet
+        # 処理が追いつかない場合は古いパケットから捨てる
+        self.packets = deque(maxlen=max_packets)
+        self._wakeup = threading.Event()
+        self._running = False
+
+    def push(self, packet):
+        """受信パケットを積む（BLEコールバックから呼ばれる）"""
+        self.packets.append(packet)
+        self._wakeup.set()
+
+    def start(self):
+        """前回の残りパケットを捨ててスレッドを開始"""
+        self.packets.clear()
+        self._running = True
+        super().start()
+
+    def stop(self):
+        """スレッドを停止して終了を待つ"""
+        self._running = False
+        self._wakeup.set()
+        self.wait()
+
+    def run(self):
+        # ループ内で使うものはローカル変数に束縛しておく
+        packets = self.packets
+        popleft = packets.popleft
+        process_packet = self._process_packet
+        wakeup = self._wakeup
+        while self._running:
+            wakeup.wait()
+            wakeup.clear()
+            while packets and self._running:
+                process_packet(*popleft())
+
 class MuseRaceGame(QtWidgets.QMainWindow):
     """メインアプリケーション"""
 
+    # 処理スレッド → メインスレッドへの通知
+    scores_updated = QtCore.pyqtSignal(float, float, float, float)  # focus, focus_left, focus_right, lateral_bias
+    contact_updated = QtCore.pyqtSignal(object)  # チャンネルごとの標準偏差
+
     def __init__(self):
         super().__init__()
         self.client = None
         self.device_address = None
         self.is_streaming = False
 
+        # EEGパケット処理スレッド（スコアと接触品質はシグナルで受け取る）
+        self.eeg_worker = EEGWorker(self._process_eeg)
+        self._push_packet = self.eeg_worker.push  # BLEコールバックで属性を辿らないよう束縛しておく
+        self.scores_updated.connect(self._on_scores_updated, QtCore.Qt.QueuedConnection)
+        self.contact_updated.connect(self._update_contact_labels, QtCore.Qt.QueuedConnection)
+
         # 脳波解析器
         self.analyzer = BrainwaveAnalyzer(window_size=256)
 
         # muse-lsl互換のデータ処理変数
-        self.timestamps = np.full(5, np.nan)
-        self.data = np.zeros((5, 12))
+        # パケット組み立て用バッファ（毎回確保せずに使い回す）
+        self._t_min = float('inf')  # 組み立て中パケットの最小受信時刻
+        self.data = np.zeros((5, 12), dtype=np.float32)
         self.last_tm = 0
         self.first_sample = True
         self.sample_index = 0
-        self.reg_params = None
+        # タイムスタンプ補正（基準時刻とサンプル間隔の推定値、スカラーのまま保持）
+        self._t0 = 0.0
+        self._dt_est = 1. / MUSE_SAMPLING_EEG_RATE
         self._P = 1e-4
 
         # ハンドルとUUIDのマッピング
@@ -515,6 +827,7 @@ class MuseRaceGame(QtWidgets.QMainWindow):
             MUSE_GATT_ATTR_TP10: 41,
             MUSE_GATT_ATTR_RIGHTAUX: 44
         }
+        self._ble_index_map = {}  # BLE特性ハンドル → 受信バッファの行番号（(上記のハンドル番号 - 32) // 3）
 
         self.handle_to_channel = {
             32: 'TP9',
@@ -529,6 +842,11 @@ class MuseRaceGame(QtWidgets.QMainWindow):
         self.focus_left = 0.0
         self.focus_right = 0.0
         self.lateral_bias = 0.0
+        self.score_interval = 32  # スコア更新間隔（サンプル数、約125ms）
+        self._samples_since_score = 0
+        self._end_handled = False  # ゲーム終了時のUI更新を済ませたか
+        self.bar_update_every = 3  # 棒グラフはゲーム更新3回に1回だけ再描画（約10Hz）
+        self._ui_frame_counter = 0
 
         # 接触品質（信号品質）
         self.contact_quality = {
@@ -538,6 +856,11 @@ class MuseRaceGame(QtWidgets.QMainWindow):
             'TP10': 'Good'
         }
 
+        # 前回表示した値（変化がないときはウィジェットを更新しない）
+        self._last_ui = {}
+        self._last_bar = np.zeros(8)
+        self._bar_values = np.zeros(8)  # 棒グラフの高さ計算用（毎フレーム確保しない）
+
         # UI初期化
         self.init_ui()
 
@@ -767,17 +1090,12 @@ class MuseRaceGame(QtWidgets.QMainWindow):
         self.power_plot.showGrid(y=True, alpha=0.3)
         self.power_plot.setYRange(0, 100, padding=0)  # Y軸を0-100に固定
 
-        # 棒グラフ用のデータ（左右チャンネル別）
-        self.bar_items = {}
+        # 棒グラフ用のデータ（左右チャンネル別、8本を1つのアイテムで描画）
         # θL, θR, αL, αR, βL, βR, FocusL, FocusR
         x_positions = [0, 0.5, 1.5, 2, 3, 3.5, 5, 5.5]
         colors_left = ['#FFD700', '#FFA500', '#4ECDC4', '#00CED1', '#FF6B6B', '#DC143C', '#96CEB4', '#5FA777']
-        labels = ['Theta_L', 'Theta_R', 'Alpha_L', 'Alpha_R', 'Beta_L', 'Beta_R', 'Focus_L', 'Focus_R']
-
-        for i, (x, label, color) in enumerate(zip(x_positions, labels, colors_left)):
-            bar = pg.BarGraphItem(x=[x], height=[0], width=0.4, brush=color)
-            self.power_plot.addItem(bar)
-            self.bar_items[label] = bar
+        self.bar_graph = pg.BarGraphItem(x=x_positions, height=self._last_bar, width=0.4, brushes=colors_left)
+        self.power_plot.addItem(self.bar_graph)
 
         # X軸のラベル設定
         x_dict = {0.25: 'θ', 1.75: 'α', 3.25: 'β', 5.25: 'Focus'}
@@ -831,10 +1149,6 @@ class MuseRaceGame(QtWidgets.QMainWindow):
 
     def update_difficulty_buttons(self):
         """難易度ボタンの表示を更新"""
-        # すべてのボタンをリセット
-        for btn in [self.easy_button, self.normal_button, self.hard_button]:
-            btn.setStyleSheet("")
-
         # 選択中のボタンをハイライト
         selected_style = """
             QPushButton {
@@ -844,12 +1158,12 @@ class MuseRaceGame(QtWidgets.QMainWindow):
             }
         """
 
-        if self.current_difficulty == 'easy':
-            self.easy_button.setStyleSheet(selected_style)
-        elif self.current_difficulty == 'normal':
-            self.normal_button.setStyleSheet(selected_style)
-        elif self.current_difficulty == 'hard':
-            self.hard_button.setStyleSheet(selected_style)
+        buttons = {'easy': self.easy_button, 'normal': self.normal_button, 'hard': self.hard_button}
+        for difficulty, btn in buttons.items():
+            style = selected_style if difficulty == self.current_difficulty else ""
+            # 表示が変わるボタンだけスタイルシートを設定し直す
+            if btn.styleSheet() != style:
+                btn.setStyleSheet(style)
 
     def toggle_brain_control(self, state):
         """脳波操作モードの切り替え"""
@@ -870,6 +1184,8 @@ class MuseRaceGame(QtWidgets.QMainWindow):
 
         try:
             self.client = BleakClient(self.device_address)
+            # ハンドル番号はバックエンド・接続ごとに変わりうるので前回の対応表は捨てる
+            self._ble_index_map.clear()
             await self.client.connect()
 
             if self.client.is_connected:
@@ -880,122 +1196,151 @@ class MuseRaceGame(QtWidgets.QMainWindow):
         except Exception as e:
             self.status_label.setText(f'Status: Connection error - {str(e)}')
 
-    def _unpack_eeg_channel(self, packet):
-        """EEGデータアンパック"""
-        aa = bitstring.Bits(bytes=packet)
-        pattern = "uint:16,uint:12,uint:12,uint:12,uint:12,uint:12,uint:12, \
-                   uint:12,uint:12,uint:12,uint:12,uint:12,uint:12"
-        res = aa.unpack(pattern)
-        packet_index = res[0]
-        data = res[1:]
-        data = 0.48828125 * (np.array(data) - 2048)
-        return packet_index, data
+    def _unpack_eeg_channel(self, packet, out=None):
+        """EEGデータアンパック（outを渡すとその配列に直接書き込む）"""
+        if HAS_NUMBA:
+            if out is None:
+                out = np.empty(12, dtype=np.float32)
+            return _unpack_eeg_packet(np.frombuffer(packet, dtype=np.uint8), out), out
+        tm, data = _unpack_eeg_unrolled(packet)
+        if out is not None:
+            out[:] = data
+            data = out
+        return tm, data
 
     def _init_timestamp_correction(self):
         """タイムスタンプ補正初期化"""
         self.sample_index = 0
         self._P = 1e-4
-        t0 = time.time()
-        self.reg_params = np.array([t0, 1. / MUSE_SAMPLING_EEG_RATE])
+        self._t0 = time.time()
+        self._dt_est = 1. / MUSE_SAMPLING_EEG_RATE
 
     def _update_timestamp_correction(self, t_source, t_receiver):
         """タイムスタンプ補正更新"""
-        t_receiver = t_receiver - self.reg_params[0]
-        P = self._P
-        R = self.reg_params[1]
-        P = P - ((P**2) * (t_source**2)) / (1 - (P * (t_source**2)))
-        R = R + P * t_source * (t_receiver - t_source * R)
-        self.reg_params[1] = R
-        self._P = P
+        t_receiver = t_receiver - self._t0
+        self._P, self._dt_est = _kalman_update(self._P, self._dt_est, float(t_source), t_receiver)
 
     def _handle_eeg(self, sender, data):
-        """EEGデータハンドラー"""
+        """EEGデータハンドラー（受信データを処理スレッドに渡すだけ）"""
+        self._push_packet((sender, bytes(data), time.time()))
+
+    def _process_eeg(self, sender, data, timestamp):
+        """EEGパケット処理（処理スレッドで実行）"""
         if self.first_sample:
             self._init_timestamp_correction()
             self.first_sample = False
 
-        timestamp = time.time()
-        sender_uuid = str(sender.uuid)
-
-        if sender_uuid not in self.uuid_to_handle:
-            return
+        # BLEのハンドル番号はバックエンドごとに異なるため、初回だけUUIDから行番号を求めてキャッシュする
+        index = self._ble_index_map.get(sender.handle)
+        if index is None:
+            handle = self.uuid_to_handle.get(str(sender.uuid))
+            if handle is None:
+                return
+            index = (handle - 32) // 3
+            self._ble_index_map[sender.handle] = index
 
-        handle = self.uuid_to_handle[sender_uuid]
-        index = int((handle - 32) / 3)
-        tm, d = self._unpack_eeg_channel(data)
+        # 受信バッファの該当チャンネル行に直接アンパック
+        tm, _ = self._unpack_eeg_channel(data, out=self.data[index])
 
         if self.last_tm == 0:
             self.last_tm = tm - 1
 
-        self.data[index] = d
-        self.timestamps[index] = timestamp
+        if timestamp < self._t_min:
+            self._t_min = timestamp
 
-        # 最後のデータを受信したら処理
-        if handle == 35:
+        # 最後のデータ（ハンドル35 = 行1）を受信したら処理
+        if index == 1:
             if tm != self.last_tm + 1:
                 if (tm - self.last_tm) != -65535:
                     self.sample_index += 12 * (tm - self.last_tm + 1)
 
             self.last_tm = tm
-            idxs = np.arange(0, 12) + self.sample_index
+            last_idx = self.sample_index + 11
             self.sample_index += 12
 
-            self._update_timestamp_correction(idxs[-1], np.nanmin(self.timestamps))
+            self._update_timestamp_correction(last_idx, self._t_min)
+
+            # データを解析器に追加（4チャンネル分を一括）
+            self.analyzer.add_samples_batch(self.data[:4])
+
+            # スコア類はscore_intervalサンプル毎に更新（画面更新より細かく計算しても意味がないため）
+            self._samples_since_score += 12
+            if self._samples_since_score >= self.score_interval:
+                self._samples_since_score = 0
+
+                # 集中度スコア
+                focus = self.analyzer.get_focus_score()
 
-            # データを解析器に追加
-            channels = ['TP9', 'AF7', 'AF8', 'TP10']
-            for i, channel in enumerate(channels):
-                if i < 4:
-                    self.analyzer.add_samples(channel, self.data[i])
+                # 左右別の集中度スコア
+                focus_left, focus_right = self.analyzer.get_focus_scores_lr()
 
-            # 集中度スコアを更新
-            self.focus_score = self.analyzer.get_focus_score()
+                # 左右バイアス
+                bias = self.analyzer.compute_lateral_bias()
 
-            # 左右別の集中度スコアを更新
-            self.focus_left, self.focus_right = self.analyzer.get_focus_scores_lr()
+                # メインスレッドに通知
+                self.scores_updated.emit(float(focus), float(focus_left), float(focus_right), float(bias))
 
-            # 左右バイアスを更新
-            self.lateral_bias = self.analyzer.compute_lateral_bias()
+                # 接触品質を評価（信号の標準偏差から、表示更新もスコアと同じ間隔で十分）
+                self._evaluate_contact_quality()
 
-            # 接触品質を評価（信号の標準偏差から）
-            self._evaluate_contact_quality()
+            self._t_min = float('inf')
+            self.data.fill(0.0)
 
-            self.timestamps = np.full(5, np.nan)
-            self.data = np.zeros((5, 12))
+    def _on_scores_updated(self, focus, focus_left, focus_right, bias):
+        """処理スレッドで計算したスコアを反映（メインスレッド）"""
+        self.focus_score = focus
+        self.focus_left = focus_left
+        self.focus_right = focus_right
+        self.lateral_bias = bias
 
     def _evaluate_contact_quality(self):
-        """各チャンネルの接触品質を評価"""
+        """各チャンネルの接触品質を評価（処理スレッドで標準偏差を計算してメインスレッドに通知）"""
+        n = self.analyzer.num_samples()
+        if n >= 128:  # 0.5秒分のデータ
+            # 標準偏差は解析器が逐次更新している合計・二乗和から求める
+            stds = self.analyzer.get_stds().tolist()
+            self.contact_updated.emit(stds)
+
+    # 接触品質の判定（標準偏差のしきい値と、各段階の表示テキスト・スタイル）
+    _CONTACT_THRESHOLDS = (20, 50)
+    _CONTACT_LEVELS = tuple(
+        (status_text, f'padding: 5px; background-color: {color}; border-radius: 3px; font-weight: bold;')
+        for status_text, color in (
+            ('Good', '#90EE90'),  # Light green
+            ('OK', '#FFD700'),  # Gold
+            ('Bad', '#FF6B6B'),  # Red
+        )
+    )
+
+    def _update_contact_labels(self, stds):
+        """接触品質の表示を更新（メインスレッド）"""
         channels = ['TP9', 'AF7', 'AF8', 'TP10']
-        for channel in channels:
-            if len(self.analyzer.eeg_buffer[channel]) >= 128:  # 0.5秒分のデータ
-                std = np.std(list(self.analyzer.eeg_buffer[channel]))
-
-                if std < 20:
-                    status_text = 'Good'
-                    color = '#90EE90'  # Light green
-                elif std < 50:
-                    status_text = 'OK'
-                    color = '#FFD700'  # Gold
-                else:
-                    status_text = 'Bad'
-                    color = '#FF6B6B'  # Red
+        for channel, std in zip(channels, stds):
+            status_text, style = self._CONTACT_LEVELS[bisect_right(self._CONTACT_THRESHOLDS, std)]
+            # 状態が変わらなければ再設定しない（スタイルシートの適用は重い）
+            if status_text == self.contact_quality[channel]:
+                continue
 
-                self.contact_quality[channel] = status_text
-                self.contact_labels[channel].setText(f'{channel}: {status_text}')
-                self.contact_labels[channel].setStyleSheet(
-                    f'padding: 5px; background-color: {color}; border-radius: 3px; font-weight: bold;'
-                )
+            self.contact_quality[channel] = status_text
+            self.contact_labels[channel].setText(f'{channel}: {status_text}')
+            self.contact_labels[channel].setStyleSheet(style)
+
+    # 送信コマンド（固定なので事前に組み立てておく）
+    _CMD_D = bytes([2, ord('d'), ord('\n')])  # ストリーミング開始
+    _CMD_H = bytes([2, ord('h'), ord('\n')])  # ストリーミング停止
+    _CMD_PRESET21 = bytes([0x04, 0x70, 0x32, 0x31, 0x0a])  # プリセットp21
+    _CMD_STR = {'d': _CMD_D, 'h': _CMD_H}
 
     def _write_cmd(self, cmd):
-        """コマンド書き込み"""
-        async def write_async():
-            await self.client.write_gatt_char(MUSE_GATT_ATTR_STREAM_TOGGLE, bytearray(cmd), response=False)
-        return asyncio.create_task(write_async())
+        """コマンド書き込み（awaitして使う）"""
+        return self.client.write_gatt_char(MUSE_GATT_ATTR_STREAM_TOGGLE, cmd, response=False)
 
     def _write_cmd_str(self, cmd):
         """文字列コマンド書き込み"""
-        cmd_bytes = [len(cmd) + 1, *(ord(char) for char in cmd), ord('\n')]
-        return self._write_cmd(cmd_bytes)
+        payload = self._CMD_STR.get(cmd)
+        if payload is None:
+            payload = bytes([len(cmd) + 1]) + cmd.encode('ascii') + b'\n'
+        return self._write_cmd(payload)
 
     async def _start_streaming(self, tutorial_mode=False):
         """ストリーミング開始（共通処理）"""
@@ -1013,12 +1358,17 @@ class MuseRaceGame(QtWidgets.QMainWindow):
             MUSE_GATT_ATTR_RIGHTAUX
         ]
 
+        # パケット処理スレッド開始
+        if not self.eeg_worker.isRunning():
+            self.eeg_worker.start()
+
+        # ハンドル→行番号の対応は今回の通知登録から作り直す
+        self._ble_index_map.clear()
         for char_uuid in eeg_characteristics:
             await self.client.start_notify(char_uuid, self._handle_eeg)
 
         # Museコマンド送信
-        preset_cmd = [0x04, 0x70, 0x32, 0x31, 0x0a]
-        await self.client.write_gatt_char(MUSE_GATT_ATTR_STREAM_TOGGLE, bytearray(preset_cmd), response=False)
+        await self._write_cmd(self._CMD_PRESET21)
         await asyncio.sleep(1)
 
         await self._write_cmd_str('d')
@@ -1028,19 +1378,8 @@ class MuseRaceGame(QtWidgets.QMainWindow):
         self.is_streaming = True
 
         # ゲームリセット
-        self.race_game.current_lane = 1
-        self.race_game.speed = 0.0
-        self.race_game.distance = 0.0
-        self.race_game.obstacles = []
-        self.race_game.game_over = False
-        self.race_game.game_clear = False
-        self.race_game.score = 0
-        self.race_game.last_obstacle_lane = -1
-        self.race_game.obstacle_cooldown = 0
-        self.race_game.bias_cooldown = 0
-        self.race_game.tutorial_mode = tutorial_mode
-        self.race_game.remaining_time = 30.0
-        self.race_game.start_time = None
+        self.race_game.reset(tutorial_mode)
+        self._end_handled = False
 
         # UI更新
         self.start_button.setEnabled(False)
@@ -1075,19 +1414,9 @@ class MuseRaceGame(QtWidgets.QMainWindow):
     @qasync.asyncSlot()
     async def retry_game(self):
         """ゲームをリトライ"""
-        # ゲームリセット
-        self.race_game.current_lane = 1
-        self.race_game.speed = 0.0
-        self.race_game.distance = 0.0
-        self.race_game.obstacles = []
-        self.race_game.game_over = False
-        self.race_game.game_clear = False
-        self.race_game.score = 0
-        self.race_game.last_obstacle_lane = -1
-        self.race_game.obstacle_cooldown = 0
-        self.race_game.bias_cooldown = 0
-        self.race_game.remaining_time = 30.0
-        self.race_game.start_time = None
+        # ゲームリセット（チュートリアルモードかどうかはそのまま）
+        self.race_game.reset()
+        self._end_handled = False
 
         # UI更新
         self.retry_button.setEnabled(False)
@@ -1117,6 +1446,7 @@ class MuseRaceGame(QtWidgets.QMainWindow):
                     for char_uuid in eeg_characteristics:
                         await self.client.stop_notify(char_uuid)
 
+                self.eeg_worker.stop()
                 self.is_streaming = False
                 self.status_label.setText('Status: Game Stopped')
 
@@ -1136,61 +1466,62 @@ class MuseRaceGame(QtWidgets.QMainWindow):
         # ゲームを更新（左右バイアスを渡す）
         self.race_game.update_game(self.focus_score, self.lateral_bias)
 
-        # ゲームオーバー時の処理
-        if self.race_game.game_over and not self.retry_button.isEnabled():
-            self.retry_button.setEnabled(True)
-            self.status_label.setText('Status: Game Over! Press Retry to play again')
-
-        # ゲームクリア時の処理
-        if self.race_game.game_clear and not self.retry_button.isEnabled():
+        # ゲーム終了時の処理（終了した最初のフレームで1回だけ）
+        if not self._end_handled and (self.race_game.game_over or self.race_game.game_clear):
+            self._end_handled = True
             self.retry_button.setEnabled(True)
-            self.status_label.setText(f'Status: Game Clear! Score: {self.race_game.score}')
+            if self.race_game.game_over:
+                # ゲームオーバー
+                self.status_label.setText('Status: Game Over! Press Retry to play again')
+            else:
+                # ゲームクリア
+                self.status_label.setText(f'Status: Game Clear! Score: {self.race_game.score}')
 
-        # UI更新
-        self.focus_bar.setValue(int(self.focus_score * 100))
-        self.speed_label.setText(f'{self.race_game.speed * 10:.1f} km/h')
-        self.distance_label.setText(f'{int(self.race_game.distance)} m')
-        self.score_label.setText(f'{self.race_game.score}')
+        # UI更新（値が変わったウィジェットだけ更新）
+        self._set_ui('focus', self.focus_bar.setValue, int(self.focus_score * 100))
+        self._set_ui('speed', self.speed_label.setText, f'{self.race_game.speed * 10:.1f} km/h')
+        self._set_ui('distance', self.distance_label.setText, f'{int(self.race_game.distance)} m')
+        self._set_ui('score', self.score_label.setText, f'{self.race_game.score}')
 
         # 左右バイアス表示
         bias_percent = int(self.lateral_bias * 100)
-        self.bias_bar.setValue(bias_percent)
+        self._set_ui('bias', self.bias_bar.setValue, bias_percent)
         if self.lateral_bias < 0:
-            self.bias_label.setText(f'Left: {abs(bias_percent)}% | Right: 0%')
+            self._set_ui('bias_text', self.bias_label.setText, f'Left: {abs(bias_percent)}% | Right: 0%')
         else:
-            self.bias_label.setText(f'Left: 0% | Right: {bias_percent}%')
+            self._set_ui('bias_text', self.bias_label.setText, f'Left: 0% | Right: {bias_percent}%')
 
-        # 棒グラフ更新（左右チャンネル別）
-        powers = self.analyzer.last_powers
-        # 左右すべてのパワー値を取得
-        theta_left = powers.get('theta_left', 0)
-        theta_right = powers.get('theta_right', 0)
-        alpha_left = powers.get('alpha_left', 0)
-        alpha_right = powers.get('alpha_right', 0)
-        beta_left = powers.get('beta_left', 0)
-        beta_right = powers.get('beta_right', 0)
-
-        # 対数スケールでパワー値を変換（0-100スケール）
-        # log10を使用し、EEGパワーの典型的な範囲（10^2 〜 10^8）にマッピング
-        def power_to_log_scale(power, min_val=1e2, max_val=1e8):
-            """パワー値を対数スケールの0-100に変換"""
-            if power <= 0:
-                power = min_val
-            log_power = np.log10(np.clip(power, min_val, max_val))
-            log_min = np.log10(min_val)
-            log_max = np.log10(max_val)
-            # 0-100スケールに正規化
-            normalized = (log_power - log_min) / (log_max - log_min) * 100
-            return max(0, min(100, normalized))
-
-        self.bar_items['Theta_L'].setOpts(height=[power_to_log_scale(theta_left)])
-        self.bar_items['Theta_R'].setOpts(height=[power_to_log_scale(theta_right)])
-        self.bar_items['Alpha_L'].setOpts(height=[power_to_log_scale(alpha_left)])
-        self.bar_items['Alpha_R'].setOpts(height=[power_to_log_scale(alpha_right)])
-        self.bar_items['Beta_L'].setOpts(height=[power_to_log_scale(beta_left)])
-        self.bar_items['Beta_R'].setOpts(height=[power_to_log_scale(beta_right)])
-        self.bar_items['Focus_L'].setOpts(height=[self.focus_left * 100])  # 0-100スケール
-        self.bar_items['Focus_R'].setOpts(height=[self.focus_right * 100])  # 0-100スケール
+        # 棒グラフ更新（左右チャンネル別）、再描画が重いのでゲーム更新より低頻度で行う
+        self._ui_frame_counter += 1
+        if self._ui_frame_counter < self.bar_update_every:
+            return
+        self._ui_frame_counter = 0
+
+        # θ・α・βの左右パワー値と左右の集中度（0-100スケール）をまとめて配列に
+        heights = self._bar_values
+        heights[:6] = self.analyzer.last_powers_arr
+        heights[6] = self.focus_left * 100
+        heights[7] = self.focus_right * 100
+
+        # パワー値（先頭6本）を対数スケールの0-100に変換（10^2未満は0扱い）
+        log_powers = heights[:6]
+        np.maximum(log_powers, 1e2, out=log_powers)
+        np.log10(log_powers, out=log_powers)
+        log_powers -= POWER_LOG_MIN
+        log_powers *= POWER_LOG_SCALE
+        np.clip(log_powers, 0.0, 100.0, out=log_powers)
+
+        # 1%以上変化した棒があるときだけ、8本まとめて1回で更新
+        changed = np.abs(heights - self._last_bar) > 0.01 * np.maximum(self._last_bar, 1.0)
+        if changed.any():
+            self._last_bar[changed] = heights[changed]
+            self.bar_graph.setOpts(height=self._last_bar)
+
+    def _set_ui(self, key, setter, value):
+        """前回と値が変わったときだけウィジェットを更新"""
+        if self._last_ui.get(key) != value:
+            setter(value)
+            self._last_ui[key] = value
 
     async def disconnect(self):
         """切断"""
@@ -1204,11 +1535,13 @@ class MuseRaceGame(QtWidgets.QMainWindow):
         """終了処理"""
         if hasattr(self, 'client') and self.client:
             asyncio.create_task(self.disconnect())
+        self.eeg_worker.stop()
         event.accept()
 
 class MuseRaceApp:
     def __init__(self):
         self.app = QtWidgets.QApplication(sys.argv)
+        warmup_jit()
         self.game = MuseRaceGame()
 
     def run(self):
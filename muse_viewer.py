@@ -9,14 +9,17 @@ import asyncio
 import numpy as np
 import time
 import struct
-import bitstring
 from collections import deque
+from functools import partial
 from PyQt5 import QtWidgets, QtCore, QtGui
 import pyqtgraph as pg
 from bleak import BleakScanner, BleakClient
 import qasync
 from scipy import signal
 
+# デバッグ出力（Trueにするとパケット受信ごとのログをコンソールに表示）
+DEBUG = False
+
 # Muse constants
 MUSE_SAMPLING_EEG_RATE = 256
 MUSE_GATT_ATTR_STREAM_TOGGLE = '273e0001-4c4d-454d-96be-f03bac821358'
@@ -28,6 +31,33 @@ MUSE_GATT_ATTR_RIGHTAUX = '273e0007-4c4d-454d-96be-f03bac821358'
 MUSE_GATT_ATTR_TELEMETRY = '273e000b-4c4d-454d-96be-f03bac821358'
 MUSE_GATT_ATTR_ACCELEROMETER = '273e000a-4c4d-454d-96be-f03bac821358'
 
+# テレメトリパケットの形式（ビッグエンディアン16ビット: シーケンス, バッテリー, 燃料計, (2バイト飛ばし), 温度）
+_TELEMETRY = struct.Struct('>HHH2xH')
+_BATT_SCALE = 100.0 / 512.0  # バッテリー生値 → パーセント
+_FUEL_SCALE = 2.2  # 燃料計生値 → ミリボルト
+
+def _build_eeg_unpacker():
+    """EEGパケット（20バイト固定レイアウト）専用のアンパック関数を生成（ループを展開）"""
+    # ペイロード18バイトを144ビット整数として読み、サンプルkは上位から12ビットずつ取り出す
+    lines = [
+        'def _unpack_eeg_unrolled(packet):',
+        "    v = int.from_bytes(packet[2:20], 'big')",
+        '    data = np.array([',
+    ]
+    for k in range(12):
+        lines.append(f'        lut[(v >> {132 - 12 * k}) & 0xFFF],')
+    lines += [
+        '    ], dtype=np.float32)',
+        '    return (packet[0] << 8) | packet[1], data',
+    ]
+    # 12ビットの生値 → μV の変換表（12 bits on a 2 mVpp range）、要素アクセスが速いようにリストで持つ
+    lut = ((np.arange(4096) - 2048) * 0.48828125).tolist()
+    namespace = {'np': np, 'lut': lut}
+    exec('\n'.join(lines), namespace)
+    return namespace['_unpack_eeg_unrolled']
+
+_unpack_eeg_unrolled = _build_eeg_unpacker()
+
 class MuseFixedViewer(QtWidgets.QMainWindow):
     def __init__(self):
         super().__init__()
@@ -35,22 +65,27 @@ class MuseFixedViewer(QtWidgets.QMainWindow):
         self.device_address = None
         self.is_streaming = False
         
-        # EEGデータバッファ
+        # EEGデータバッファ（行: TP9, AF7, AF8, TP10 のリングバッファ、書き込み位置は全チャンネル共通）
         self.buffer_size = 1000
-        self.eeg_data = {
-            'TP9': deque(maxlen=self.buffer_size),
-            'AF7': deque(maxlen=self.buffer_size),
-            'AF8': deque(maxlen=self.buffer_size),
-            'TP10': deque(maxlen=self.buffer_size)
-        }
+        self.channels = ('TP9', 'AF7', 'AF8', 'TP10')
+        self.eeg_ring = np.zeros((len(self.channels), self.buffer_size), dtype=np.float32)
+        self.ring_pos = 0  # 次に書き込む列
+        self.ring_count = 0  # バッファ内の有効サンプル数
         
         # muse-lsl互換のデータ処理変数
-        self.timestamps = np.full(5, np.nan)
+        self._t_min = float('inf')  # パケットセット内で最も早い受信時刻
+
+        # BLEコールバックで受け取った未処理パケット（イベントループ上でまとめて処理）
+        self._pending = deque()
+        self._drain_scheduled = False
+        self._loop = None
         self.data = np.zeros((5, 12))
         self.last_tm = 0
         self.first_sample = True
         self.sample_index = 0
-        self.reg_params = None
+        # タイムスタンプ補正（基準時刻とサンプル間隔の推定値、スカラーのまま保持）
+        self._t0 = 0.0
+        self._dt_est = 1. / MUSE_SAMPLING_EEG_RATE
         self._P = 1e-4
         
         # ハンドルとUUIDのマッピング（muse-lsl方式）
@@ -83,7 +118,7 @@ class MuseFixedViewer(QtWidgets.QMainWindow):
         self.highcut = 50.0
         self.filter_order = 4
         self.sos = None
-        self.zi = {}  # フィルタの初期状態を各チャンネルごとに保存
+        self.zi = None  # フィルタの内部状態（(セクション数, 4チャンネル, 2)、4チャンネルまとめて保持）
 
         # 接触品質データ（信号品質から推定）
         self.contact_quality = {
@@ -92,20 +127,29 @@ class MuseFixedViewer(QtWidgets.QMainWindow):
             'AF8': 'Good',
             'TP10': 'Good'
         }
-        self.signal_std = {
-            'TP9': deque(maxlen=256),  # 1秒分のデータ
-            'AF7': deque(maxlen=256),
-            'AF8': deque(maxlen=256),
-            'TP10': deque(maxlen=256)
-        }
+        self.std_window = 256  # 標準偏差を計算するサンプル数（1秒分、リングバッファの末尾を使う）
+        # 直近std_windowサンプルの合計・二乗和（標準偏差をO(1)で求めるため逐次更新）
+        self._std_sum = np.zeros(len(self.channels))
+        self._std_sumsq = np.zeros(len(self.channels))
 
         # テレメトリデータ
         self.battery_level = 0.0
         self.temperature = 0.0
+        self.telemetry_ui_interval = 1.0  # テレメトリ表示の更新間隔（秒）
+        self._last_telemetry_ui = 0.0
 
         # UI初期化
         self.init_ui()
         
+        # プロットのX座標（サンプル番号、毎回生成しない）
+        self._x = np.arange(self.buffer_size)
+        # リングバッファが折り返しているときに時系列順へ並べ直すバッファ
+        self._plot_buf = np.empty_like(self.eeg_ring)
+        # Y軸の自動調整はプロット更新20回（約1秒）に1回
+        self.yrange_every = 20
+        self._plot_tick = 0
+        self._last_yrange = {}  # チャンネル → 最後に設定した (下限, 上限)
+
         # プロット更新タイマー
         self.timer = QtCore.QTimer()
         self.timer.timeout.connect(self.update_plots)
@@ -222,6 +266,9 @@ class MuseFixedViewer(QtWidgets.QMainWindow):
             plot.setYRange(-200, 200)
             
             curve = plot.plot(pen=pg.mkPen(color=self.colors[i], width=2))
+            # 表示幅より多い点は間引いて描画（ピークは保持）
+            curve.setDownsampling(auto=True, method='peak')
+            curve.setClipToView(True)
             
             self.plots[channel] = plot
             self.curves[channel] = curve
@@ -307,9 +354,9 @@ class MuseFixedViewer(QtWidgets.QMainWindow):
             # Butterworthバンドパスフィルタを設計
             self.sos = signal.butter(self.filter_order, [low, high], btype='band', output='sos')
 
-            # 各チャンネルのフィルタ初期状態を初期化
-            for channel in ['TP9', 'AF7', 'AF8', 'TP10']:
-                self.zi[channel] = signal.sosfilt_zi(self.sos)
+            # 全チャンネルのフィルタ初期状態を初期化（4チャンネル分を並べて一括フィルタ用に）
+            zi = signal.sosfilt_zi(self.sos)
+            self.zi = np.repeat(zi[:, np.newaxis, :], len(self.channels), axis=1)
 
             print(f"Filter designed: {self.lowcut}-{self.highcut} Hz")
         except Exception as e:
@@ -317,22 +364,6 @@ class MuseFixedViewer(QtWidgets.QMainWindow):
             self.filter_enabled = False
             self.filter_checkbox.setChecked(False)
 
-    def apply_filter(self, data, channel):
-        """バンドパスフィルタを適用"""
-        if not self.filter_enabled or self.sos is None:
-            return data
-
-        try:
-            if channel not in self.zi:
-                self.zi[channel] = signal.sosfilt_zi(self.sos)
-
-            # フィルタを適用
-            filtered_data, self.zi[channel] = signal.sosfilt(self.sos, data, zi=self.zi[channel])
-            return filtered_data
-        except Exception as e:
-            print(f"❌ Filter application error: {e}")
-            return data
-
     def _handle_telemetry(self, sender, data):
         """テレメトリデータハンドラー（バッテリー、温度など）"""
         try:
@@ -341,50 +372,52 @@ class MuseFixedViewer(QtWidgets.QMainWindow):
 
             # muse-jsのparseTelemetryに基づく解析
             # データはビッグエンディアン（>）の16ビット整数
-            import struct
-
-            sequence_id = struct.unpack('>H', data[0:2])[0]
-            battery_raw = struct.unpack('>H', data[2:4])[0]
-            fuel_gauge_raw = struct.unpack('>H', data[4:6])[0]
-            temperature_raw = struct.unpack('>H', data[8:10])[0]
+            sequence_id, battery_raw, fuel_gauge_raw, temperature_raw = _TELEMETRY.unpack_from(data)
 
             # 変換
-            self.battery_level = battery_raw / 512.0 * 100  # パーセント
-            fuel_gauge_voltage = fuel_gauge_raw * 2.2  # ミリボルト
+            self.battery_level = battery_raw * _BATT_SCALE  # パーセント
             self.temperature = temperature_raw  # 生の値（単位不明）
 
-            # UI更新
-            self.battery_label.setText(f'Battery: {self.battery_level:.1f}% | Temp: {self.temperature}')
+            # UI更新（バッテリー・温度はゆっくりしか変わらないので間隔を空ける）
+            now = time.monotonic()
+            if now - self._last_telemetry_ui >= self.telemetry_ui_interval:
+                self._last_telemetry_ui = now
+                self.battery_label.setText(f'Battery: {self.battery_level:.1f}% | Temp: {self.temperature}')
 
-            print(f"📊 Telemetry - Battery: {self.battery_level:.1f}%, Voltage: {fuel_gauge_voltage:.0f}mV, Temp: {self.temperature}")
+            if DEBUG:
+                fuel_gauge_voltage = fuel_gauge_raw * _FUEL_SCALE  # ミリボルト
+                print(f"📊 Telemetry - Battery: {self.battery_level:.1f}%, Voltage: {fuel_gauge_voltage:.0f}mV, Temp: {self.temperature}")
         except Exception as e:
             print(f"❌ Telemetry handler error: {e}")
 
     def _evaluate_contact_quality(self):
         """信号の標準偏差から接触品質を評価"""
-        channels = ['TP9', 'AF7', 'AF8', 'TP10']
-        for channel in channels:
-            if len(self.signal_std[channel]) >= 128:  # 0.5秒分のデータ
-                std = np.std(list(self.signal_std[channel]))
-
-                # 標準偏差に基づく評価（muse-lslの推奨値）
-                if std < 20:
-                    status_text = 'Good'
-                    color = '#90EE90'  # 薄緑
-                elif std < 50:
-                    status_text = 'OK'
-                    color = '#FFD700'  # 金色
-                else:
-                    status_text = 'Bad'
-                    color = '#FF6B6B'  # 赤
-
-                self.contact_quality[channel] = status_text
+        n = min(self.ring_count, self.std_window)
+        if n < 128:  # 0.5秒分のデータ
+            return
 
-                # UI更新
-                self.contact_labels[channel].setText(f'{channel}: {status_text}')
-                self.contact_labels[channel].setStyleSheet(
-                    f'padding: 5px; background-color: {color}; border-radius: 3px; font-weight: bold;'
-                )
+        # 直近のサンプルの合計・二乗和から4チャンネル分の標準偏差をまとめて計算（np.stdと同じ母標準偏差）
+        mean = self._std_sum / n
+        stds = np.sqrt(np.maximum(self._std_sumsq / n - mean * mean, 0.0))
+        for channel, std in zip(self.channels, stds.tolist()):
+            # 標準偏差に基づく評価（muse-lslの推奨値）
+            if std < 20:
+                status_text = 'Good'
+                color = '#90EE90'  # 薄緑
+            elif std < 50:
+                status_text = 'OK'
+                color = '#FFD700'  # 金色
+            else:
+                status_text = 'Bad'
+                color = '#FF6B6B'  # 赤
+
+            self.contact_quality[channel] = status_text
+
+            # UI更新
+            self.contact_labels[channel].setText(f'{channel}: {status_text}')
+            self.contact_labels[channel].setStyleSheet(
+                f'padding: 5px; background-color: {color}; border-radius: 3px; font-weight: bold;'
+            )
 
     @qasync.asyncSlot()
     async def connect_device(self):
@@ -414,64 +447,64 @@ class MuseFixedViewer(QtWidgets.QMainWindow):
             print(f"Connection error: {e}")
     
     def _unpack_eeg_channel(self, packet):
-        """muse-lslのEEGデータアンパック処理"""
-        aa = bitstring.Bits(bytes=packet)
-        pattern = "uint:16,uint:12,uint:12,uint:12,uint:12,uint:12,uint:12, \
-                   uint:12,uint:12,uint:12,uint:12,uint:12,uint:12"
-        
-        res = aa.unpack(pattern)
-        packet_index = res[0]
-        data = res[1:]
-        # 12 bits on a 2 mVpp range
-        data = 0.48828125 * (np.array(data) - 2048)
-        return packet_index, data
+        """muse-lslのEEGデータアンパック処理（起動時に生成した展開済み関数を使う）"""
+        return _unpack_eeg_unrolled(packet)
     
     def _init_timestamp_correction(self):
         """タイムスタンプ補正初期化"""
         self.sample_index = 0
         self._P = 1e-4
-        t0 = time.time()
-        self.reg_params = np.array([t0, 1. / MUSE_SAMPLING_EEG_RATE])
+        self._t0 = time.time()
+        self._dt_est = 1. / MUSE_SAMPLING_EEG_RATE
     
     def _update_timestamp_correction(self, t_source, t_receiver):
         """タイムスタンプ補正更新"""
-        t_receiver = t_receiver - self.reg_params[0]
+        # NumPyスカラーを介さずPythonのfloatだけで計算する
+        t_source = float(t_source)
+        t_receiver = t_receiver - self._t0
         
         P = self._P
-        R = self.reg_params[1]
+        R = self._dt_est
         P = P - ((P**2) * (t_source**2)) / (1 - (P * (t_source**2)))
         R = R + P * t_source * (t_receiver - t_source * R)
         
-        self.reg_params[1] = R
+        self._dt_est = R
         self._P = P
     
-    def _handle_eeg(self, sender, data):
-        """EEGデータハンドラー（muse-lsl方式）"""
+    def _handle_eeg(self, handle, index, sender, data):
+        """EEGデータハンドラー（受信時刻と一緒にキューに積むだけ、処理は_drain_eegで行う）
+        handle（muse-lslのハンドル番号）とindex（データ行）は通知登録時に特性ごとに束縛しておく"""
+        self._pending.append((handle, index, bytes(data), time.time()))
+        if not self._drain_scheduled:
+            self._drain_scheduled = True
+            self._loop.call_soon_threadsafe(self._drain_eeg)
+
+    def _drain_eeg(self):
+        """溜まったEEGパケットをまとめて処理"""
+        self._drain_scheduled = False
+        pending = self._pending
+        while pending:
+            self._process_eeg(*pending.popleft())
+
+    def _process_eeg(self, handle, index, data, timestamp):
+        """EEGパケット処理（muse-lsl方式）"""
         if self.first_sample:
             self._init_timestamp_correction()
             self.first_sample = False
         
-        timestamp = time.time()
-        
-        # ハンドルを取得（muse-lsl方式）
-        sender_uuid = str(sender.uuid)
-        if sender_uuid not in self.uuid_to_handle:
-            return
-        
-        handle = self.uuid_to_handle[sender_uuid]
-        
         # samples are received in this order : 44, 41, 38, 32, 35
         # wait until we get 35 and call the data callback
-        index = int((handle - 32) / 3)
         tm, d = self._unpack_eeg_channel(data)
         
         if self.last_tm == 0:
             self.last_tm = tm - 1
         
         self.data[index] = d
-        self.timestamps[index] = timestamp
+        if timestamp < self._t_min:
+            self._t_min = timestamp
         
-        print(f"Received EEG data from {self.handle_to_channel[handle]} (handle {handle}): {len(data)} bytes, tm={tm}")
+        if DEBUG:
+            print(f"Received EEG data from {self.handle_to_channel[handle]} (handle {handle}): {len(data)} bytes, tm={tm}")
         
         # 最後のデータ（handle == 35, AF7）を受信したらコールバック実行
         if handle == 35:
@@ -482,47 +515,93 @@ class MuseFixedViewer(QtWidgets.QMainWindow):
             
             self.last_tm = tm
             
-            # タイムスタンプインデックス計算
-            idxs = np.arange(0, 12) + self.sample_index
+            # このセット最後のサンプルのインデックス（補正には末尾だけ使うので配列は作らない）
+            last_idx = self.sample_index + 11
             self.sample_index += 12
             
             # タイムスタンプ補正更新
-            self._update_timestamp_correction(idxs[-1], np.nanmin(self.timestamps))
-            
-            # タイムスタンプを外挿
-            timestamps = self.reg_params[1] * idxs + self.reg_params[0]
+            self._update_timestamp_correction(last_idx, self._t_min)
             
             # データをバッファに追加（最初の4チャンネル）
-            channels = ['TP9', 'AF7', 'AF8', 'TP10']
-            for i, channel in enumerate(channels):
-                if i < 4:
-                    # フィルタを適用
-                    samples = self.data[i]
-                    if self.filter_enabled:
-                        samples = self.apply_filter(samples, channel)
-
-                    for sample in samples:
-                        self.eeg_data[channel].append(sample)
-                        # 接触品質評価用に標準偏差計算用データを保存
-                        self.signal_std[channel].append(sample)
+            block = self.data[:4]
+            if self.filter_enabled and self.sos is not None:
+                # 4チャンネルまとめてバンドパスフィルタを適用
+                block, self.zi = signal.sosfilt(self.sos, block, axis=1, zi=self.zi)
+            self._append_samples(block)
             
             self.sample_count += 12
-            print(f"Processed complete EEG sample set, total samples: {self.sample_count}")
+            if DEBUG:
+                print(f"Processed complete EEG sample set, total samples: {self.sample_count}")
             
-            # データをリセット
-            self.timestamps = np.full(5, np.nan)
-            self.data = np.zeros((5, 12))
+            # データをリセット（配列は使い回す）
+            self._t_min = float('inf')
+            self.data.fill(0.0)
     
+    def _append_samples(self, block):
+        """4チャンネル分のサンプル（(4, n)）をリングバッファにまとめて書き込む"""
+        n = block.shape[1]
+
+        # 標準偏差の窓から外れる古いサンプルの分を合計から引く
+        # （窓はバッファより十分短いので、ここで書き込む位置とは重ならない）
+        w = min(self.ring_count, self.std_window)
+        n_out = w + n - min(self.ring_count + n, self.std_window)
+        if n_out > 0:
+            old = self._ring_slice(self.ring_pos - w, n_out)
+            self._std_sum -= old.sum(axis=1, dtype=np.float64)
+            self._std_sumsq -= np.square(old, dtype=np.float64).sum(axis=1)
+
+        start = self.ring_pos
+        end = start + n
+        if end <= self.buffer_size:
+            self.eeg_ring[:, start:end] = block
+        else:
+            first = self.buffer_size - start
+            self.eeg_ring[:, start:] = block[:, :first]
+            self.eeg_ring[:, :end - self.buffer_size] = block[:, first:]
+        self.ring_pos = end % self.buffer_size
+        self.ring_count = min(self.ring_count + n, self.buffer_size)
+
+        if end >= self.buffer_size:
+            # バッファが一周したら合計を計算し直す（逐次更新の丸め誤差をリセット）
+            recent = self._get_recent(min(self.ring_count, self.std_window))
+            self._std_sum = recent.sum(axis=1, dtype=np.float64)
+            self._std_sumsq = np.square(recent, dtype=np.float64).sum(axis=1)
+        else:
+            # 書き込んだばかりのサンプル（float32に丸めた値）の分を足す
+            new = self.eeg_ring[:, start:end]
+            self._std_sum += new.sum(axis=1, dtype=np.float64)
+            self._std_sumsq += np.square(new, dtype=np.float64).sum(axis=1)
+
+    def _ring_slice(self, start, n, out=None):
+        """リングバッファのstart列目からnサンプルを時系列順に取得
+        （折り返していなければコピーなしのビュー、折り返す場合はoutの先頭n列に並べ直す）"""
+        start %= self.buffer_size
+        end = start + n
+        if end <= self.buffer_size:
+            return self.eeg_ring[:, start:end]
+        return np.concatenate((self.eeg_ring[:, start:], self.eeg_ring[:, :end - self.buffer_size]), axis=1,
+                              out=None if out is None else out[:, :n])
+
+    def _get_recent(self, n, out=None):
+        """直近nサンプルを時系列順に取得（(4, n)）"""
+        return self._ring_slice(self.ring_pos - n, n, out)
+
+    # 送信コマンド（固定なので事前に組み立てておく）
+    _CMD_D = bytes([2, ord('d'), ord('\n')])  # ストリーミング開始
+    _CMD_H = bytes([2, ord('h'), ord('\n')])  # ストリーミング停止
+    _CMD_PRESET21 = bytes([0x04, 0x70, 0x32, 0x31, 0x0a])  # プリセットp21
+    _CMD_STR = {'d': _CMD_D, 'h': _CMD_H}
+
     def _write_cmd(self, cmd):
-        """コマンド書き込み（muse-lsl方式）"""
-        async def write_async():
-            await self.client.write_gatt_char(MUSE_GATT_ATTR_STREAM_TOGGLE, bytearray(cmd), response=False)
-        return asyncio.create_task(write_async())
+        """コマンド書き込み（muse-lsl方式、awaitして使う）"""
+        return self.client.write_gatt_char(MUSE_GATT_ATTR_STREAM_TOGGLE, cmd, response=False)
     
     def _write_cmd_str(self, cmd):
         """文字列コマンド書き込み（muse-lsl方式）"""
-        cmd_bytes = [len(cmd) + 1, *(ord(char) for char in cmd), ord('\n')]
-        return self._write_cmd(cmd_bytes)
+        payload = self._CMD_STR.get(cmd)
+        if payload is None:
+            payload = bytes([len(cmd) + 1]) + cmd.encode('ascii') + b'\n'
+        return self._write_cmd(payload)
     
     @qasync.asyncSlot()
     async def start_streaming(self):
@@ -552,9 +631,16 @@ class MuseFixedViewer(QtWidgets.QMainWindow):
                 MUSE_GATT_ATTR_RIGHTAUX
             ]
 
+            # 受信パケットはこのイベントループ上で処理する（前回の残りは捨てる）
+            self._loop = asyncio.get_running_loop()
+            self._pending.clear()
+
             for char_uuid in eeg_characteristics:
                 try:
-                    await self.client.start_notify(char_uuid, self._handle_eeg)
+                    # 特性ごとにハンドル番号とデータ行を束縛したハンドラーを登録（受信時にUUIDを引かない）
+                    handle = self.uuid_to_handle[char_uuid]
+                    handler = partial(self._handle_eeg, handle, (handle - 32) // 3)
+                    await self.client.start_notify(char_uuid, handler)
                     print(f"✅ Started notifications for {char_uuid}")
                 except Exception as e:
                     print(f"❌ Failed to start notifications for {char_uuid}: {e}")
@@ -563,8 +649,7 @@ class MuseFixedViewer(QtWidgets.QMainWindow):
             
             # プリセット選択（muse-lsl方式）
             print("Setting preset p21...")
-            preset_cmd = [0x04, 0x70, 0x32, 0x31, 0x0a]  # p21
-            await self.client.write_gatt_char(MUSE_GATT_ATTR_STREAM_TOGGLE, bytearray(preset_cmd), response=False)
+            await self._write_cmd(self._CMD_PRESET21)
             await asyncio.sleep(1)
             
             # 初期化コマンド（muse-lsl muse.pyから）
@@ -661,21 +746,35 @@ class MuseFixedViewer(QtWidgets.QMainWindow):
         # 接触品質評価
         self._evaluate_contact_quality()
 
-        # プロット更新
-        for channel, curve in self.curves.items():
-            data = np.array(self.eeg_data[channel])
-            if len(data) > 0:
-                x = np.arange(len(data))
-                curve.setData(x, data)
-
-                # Y軸の自動調整
-                if len(data) > 50:
-                    recent_data = data[-200:]
-                    mean_val = np.mean(recent_data)
-                    std_val = np.std(recent_data)
-                    if std_val > 0:
-                        y_range = max(50, 3 * std_val)
-                        self.plots[channel].setYRange(mean_val - y_range, mean_val + y_range)
+        # プロット更新（リングバッファを時系列順に並べて1回だけ取り出す）
+        n = self.ring_count
+        if n == 0:
+            return
+        window = self._get_recent(n, out=self._plot_buf)
+        x = self._x[:n]
+        for channel, data in zip(self.channels, window):
+            self.curves[channel].setData(x, data)
+
+        # Y軸の自動調整（約1秒に1回、4チャンネルまとめて統計を計算）
+        self._plot_tick += 1
+        if self._plot_tick < self.yrange_every or n <= 50:
+            return
+        self._plot_tick = 0
+        recent_data = window[:, -200:]
+        mean_vals = recent_data.mean(axis=1)
+        std_vals = recent_data.std(axis=1)
+        for channel, mean_val, std_val in zip(self.channels, mean_vals.tolist(), std_vals.tolist()):
+            if std_val > 0:
+                y_range = max(50, 3 * std_val)
+                lo, hi = mean_val - y_range, mean_val + y_range
+                # 前回の範囲から幅の10%以上動いたときだけ設定し直す（再描画を減らす）
+                last = self._last_yrange.get(channel)
+                if last is not None:
+                    tol = 0.1 * (last[1] - last[0])
+                    if abs(lo - last[0]) <= tol and abs(hi - last[1]) <= tol:
+                        continue
+                self._last_yrange[channel] = (lo, hi)
+                self.plots[channel].setYRange(lo, hi)
     
     async def disconnect(self):
         """デバイス切断"""